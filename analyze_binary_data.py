@@ -5,6 +5,10 @@ Helps understand what mode the sensor is in
 """
 
 import struct
+import sys
+
+# 7-byte packet observed from a sensor with Pin 1 (BW) floating
+_PKT = struct.Struct('<7B')
 
 # Sample binary data patterns from the test output
 sample_data = [
@@ -17,20 +21,27 @@ print("="*60)
 print("MB1300AE Binary Data Pattern Analysis")
 print("="*60)
 
+def _printable(b):
+    return chr(b) if 32 <= b < 127 else '?'
+
 for i, data in enumerate(sample_data, 1):
-    print(f"\nPattern {i}: {data.hex()} ({len(data)} bytes)")
-    print(f"  ASCII view: {repr(data)}")
-    print(f"  Byte values: {[f'0x{b:02x}' for b in data]}")
+    report = (f"\nPattern {i}: {data.hex()} ({len(data)} bytes)\n"
+              f"  ASCII view: {data!r}\n"
+              f"  Byte values: {[f'0x{b:02x}' for b in data]}\n")
     
     # Try to decode as if it contains distance info
-    if len(data) >= 7:
-        print(f"  Byte 0: 0x{data[0]:02x} ({data[0]}) = '+' or 0x2B")
-        print(f"  Byte 1: 0x{data[1]:02x} ({data[1]})")
-        print(f"  Byte 2: 0x{data[2]:02x} ({data[2]})")
-        print(f"  Byte 3: 0x{data[3]:02x} ({data[3]}) = '{chr(data[3]) if 32 <= data[3] < 127 else '?'}'")
-        print(f"  Byte 4: 0x{data[4]:02x} ({data[4]}) = '{chr(data[4]) if 32 <= data[4] < 127 else '?'}'")
-        print(f"  Byte 5: 0x{data[5]:02x} ({data[5]}) = '{chr(data[5]) if 32 <= data[5] < 127 else '?'}'")
-        print(f"  Byte 6: 0x{data[6]:02x} ({data[6]})")
+    if len(data) >= _PKT.size:
+        b0, b1, b2, b3, b4, b5, b6 = _PKT.unpack_from(data, 0)
+        report += (f"  Byte 0: 0x{b0:02x} ({b0}) = '+' or 0x2B\n"
+                   f"  Byte 1: 0x{b1:02x} ({b1})\n"
+                   f"  Byte 2: 0x{b2:02x} ({b2})\n"
+                   f"  Byte 3: 0x{b3:02x} ({b3}) = '{_printable(b3)}'\n"
+                   f"  Byte 4: 0x{b4:02x} ({b4}) = '{_printable(b4)}'\n"
+                   f"  Byte 5: 0x{b5:02x} ({b5}) = '{_printable(b5)}'\n"
+                   f"  Byte 6: 0x{b6:02x} ({b6})\n")
+    
+    # One write per packet instead of one print per line
+    sys.stdout.write(report)
 
 print("\n" + "="*60)
 print("ANALYSIS:")
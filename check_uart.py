@@ -3,22 +3,19 @@
 Check available UART devices on Orange Pi 5
 """
 import os
-import glob
 
 print("Orange Pi 5 UART Device Check")
 print("=" * 60)
 
-# Check for UART devices
-uart_patterns = ['/dev/ttyS*', '/dev/ttyAMA*', '/dev/ttyFIQ*']
-found_devices = []
+# Check for UART devices (single pass over /dev)
+uart_prefixes = ('ttyS', 'ttyAMA', 'ttyFIQ')
 
-for pattern in uart_patterns:
-    devices = glob.glob(pattern)
-    found_devices.extend(devices)
+with os.scandir('/dev') as entries:
+    found_devices = sorted(e.path for e in entries if e.name.startswith(uart_prefixes))
 
 if found_devices:
     print("\n✓ Found UART devices:")
-    for dev in sorted(found_devices):
+    for dev in found_devices:
         # Check if readable
         readable = os.access(dev, os.R_OK | os.W_OK)
         print(f"  {dev} {'(accessible)' if readable else '(need sudo)'}")
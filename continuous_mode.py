@@ -2,102 +2,118 @@
 """
 MB1300AE Continuous Serial Mode - Read distance continuously
 MB1300AE outputs serial data continuously when RX is HIGH or floating
+
+Serial output is read through the kernel UART driver (UART4 -> /dev/ttyS4,
+UART3 -> /dev/ttyS3); see check_uart.py for enabling the overlays.
 """
+import re
 import time
-import OPi.GPIO as GPIO
+import serial
 import csv
 import os
-from dataclasses import dataclass
-from collections import deque
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 
-@dataclass
-class Measurement:
-    sensor: str
-    distance_inches: float
-    timestamp: float
+from gpio_fastpath import enable_realtime
 
-class SoftwareSerial:
-    """9600 baud software serial reader"""
-    BIT_DURATION = 1.0 / 9600
-    
-    def __init__(self, pin):
-        self.pin = pin
-        GPIO.setup(pin, GPIO.IN)
-    
-    def read_byte(self, timeout=0.1):
-        start = time.time()
-        # Wait for start bit (HIGH->LOW)
-        while GPIO.input(self.pin) == GPIO.HIGH:
-            if time.time() - start > timeout:
-                return None
-        
-        time.sleep(self.BIT_DURATION / 2)  # Middle of start bit
-        if GPIO.input(self.pin) != GPIO.LOW:
-            return None
-        
-        # Read 8 bits
-        byte = 0
-        for i in range(8):
-            time.sleep(self.BIT_DURATION)
-            if GPIO.input(self.pin):
-                byte |= (1 << i)
-        
-        time.sleep(self.BIT_DURATION)  # Stop bit
-        return byte
-    
-    def read_line(self, timeout=0.3):
-        line = []
-        start = time.time()
-        while time.time() - start < timeout:
-            b = self.read_byte(timeout=0.05)
-            if b is None:
-                continue
-            if b == 0x0D:  # CR
-                break
-            if 32 <= b <= 126:
-                line.append(chr(b))
-        return ''.join(line) if line else None
+REALTIME_PRIORITY = 50  # SCHED_FIFO priority for the reader threads
+
+# Complete frame: 'R' + 3 ASCII digits (cm) + CR
+_FRAME_RE = re.compile(rb'R(\d{3})\r')
+
+# Packed ASCII digit triple ('000'..'999' as a big-endian int) -> inches
+_TABLE = {
+    int.from_bytes(f"{cm:03d}".encode('ascii'), 'big'): cm / 2.54
+    for cm in range(1000)
+}
+
+class MeasurementLog:
+    """Append-only columnar log: sensor index, distance (inches), monotonic_ns timestamp"""
+    
+    def __init__(self, sensor_names):
+        self.sensor_names = sensor_names
+        self.sensor = array('B')
+        self.distance = array('f')
+        self.timestamp_ns = array('q')
+    
+    def __len__(self):
+        return len(self.sensor)
+    
+    def append(self, sensor_idx, inches, timestamp_ns):
+        self.sensor.append(sensor_idx)
+        self.distance.append(inches)
+        self.timestamp_ns.append(timestamp_ns)
+    
+    def rows(self, offset_ns=0):
+        """Yield CSV rows, shifting timestamps by offset_ns and converting to seconds"""
+        names = self.sensor_names
+        for idx, inches, ts in zip(self.sensor, self.distance, self.timestamp_ns):
+            yield names[idx], f"{inches:.2f}", f"{(ts + offset_ns) * 1e-9:.6f}"
 
 class MB1300Continuous:
     """MB1300AE in continuous output mode"""
     
-    def __init__(self, name, tx_pin):
+    RING_SIZE = 1000  # Most recent distances kept for statistics
+    FRAME_SIZE = 5    # "Rxxx\r"
+    MAX_PENDING = 64  # Drop an unterminated tail longer than this (not ASCII output)
+    
+    def __init__(self, name, port):
         self.name = name
-        self.serial = SoftwareSerial(tx_pin)
-        self.measurements = deque(maxlen=1000)
-    
-    def read_distance(self):
-        """Read one serial line: Rxxx where xxx is centimeters (convert to inches)"""
-        line = self.serial.read_line()
-        if line and line.startswith('R') and len(line) > 1:
-            try:
-                cm = float(line[1:])
-                inches = cm / 2.54  # Convert cm to inches
-                return inches
-            except:
-                return None
-        return None
+        self.ser = serial.Serial(port, 9600, timeout=0.05)
+        # ASYNC_LOW_LATENCY: deliver bytes without driver-side batching
+        # (Linux only; ignored where the driver refuses it)
+        try:
+            self.ser.set_low_latency_mode(True)
+        except (AttributeError, OSError, ValueError):
+            pass
+        # Preallocated ring of float32 distances (inches)
+        self.ring = array('f', bytes(4 * self.RING_SIZE))
+        self.cursor = 0
+        self.count = 0
+        # Bytes after the last CR, completed by the next read
+        self.pending = b''
+    
+    def record(self, inches):
+        """Store a distance in the ring buffer"""
+        self.ring[self.cursor] = inches
+        self.cursor = (self.cursor + 1) % self.RING_SIZE
+        self.count += 1
+    
+    def statistics(self):
+        """Return (count, avg, min, max) over the ring buffer, or None if empty"""
+        n = min(self.count, self.RING_SIZE)
+        if n == 0:
+            return None
+        valid = self.ring if n == self.RING_SIZE else self.ring[:n]
+        return n, sum(valid) / n, min(valid), max(valid)
+    
+    def read_distances(self):
+        """
+        Read all buffered serial frames: Rxxx\\r where xxx is centimeters
+        
+        One read() takes everything the driver has queued (waiting up to the
+        timeout for at least one frame). Returns distances in inches, oldest first.
+        """
+        ser = self.ser
+        data = self.pending + ser.read(max(ser.in_waiting, self.FRAME_SIZE))
+        
+        # Keep the partial frame after the last CR for the next call
+        end = data.rfind(b'\r') + 1
+        self.pending = data[end:] if len(data) - end <= self.MAX_PENDING else b''
+        
+        # findall() skips noise between frames; digits are validated by the
+        # regex and the table converts cm to inches
+        return [_TABLE[int.from_bytes(digits, 'big')] for digits in _FRAME_RE.findall(data, 0, end)]
 
 def main():
     print("MB1300AE Continuous Serial Reader")
     print("Sensors will output continuously (no triggering needed)")
     print("=" * 60)
     
-    GPIO.setmode(GPIO.BOARD)
-    GPIO.setwarnings(False)
-    
-    # Setup sensors
-    sensor1 = MB1300Continuous("Sensor_1", tx_pin=12)
-    sensor2 = MB1300Continuous("Sensor_2", tx_pin=18)
-    
-    # IMPORTANT: Pin 1 (BW) must be HIGH or floating to enable serial output
-    # If you have Pin 1 connected, set it HIGH here
-    # For now, we'll enable continuous ranging mode with RX HIGH
-    
-    GPIO.setup(16, GPIO.OUT)  # RX for sensor 1
-    GPIO.setup(22, GPIO.OUT)  # RX for sensor 2
-    GPIO.output(16, GPIO.HIGH)  # Enable continuous mode
-    GPIO.output(22, GPIO.HIGH)
+    # Setup sensors (sensor TX -> Orange Pi UART RX)
+    # Sensor RX is left unconnected (floating) so the sensors range continuously
+    sensor1 = MB1300Continuous("Sensor_1", port="/dev/ttyS4")  # Pin 16 - UART4_RX_M0
+    sensor2 = MB1300Continuous("Sensor_2", port="/dev/ttyS3")  # Pin 21 - UART3_RX_M0
     
     print("NOTE: Sensor Pin 1 (BW) must be HIGH or open for serial output!")
     print("If sensors don't respond, connect Pin 1 to +5V or leave it floating")
@@ -105,30 +121,46 @@ def main():
     print("\nSensors enabled in continuous mode")
     print("Reading serial data... Press Ctrl+C to stop\n")
     
-    all_measurements = []
+    log = MeasurementLog([sensor1.name, sensor2.name])
     count = 0
     
+    # Wall-clock reference so monotonic timestamps can be written as epoch time
+    t0_wall_ns = time.time_ns()
+    t0_mono_ns = time.monotonic_ns()
+    
+    # Before starting the workers so they inherit the policy
+    enable_realtime(REALTIME_PRIORITY)
+    
+    # One worker per UART; pyserial releases the GIL while blocked in read
+    pool = ThreadPoolExecutor(max_workers=2)
+    
     try:
         while True:
-            # Read from sensor 1
-            dist1 = sensor1.read_distance()
-            if dist1:
-                m = Measurement("Sensor_1", dist1, time.time())
-                sensor1.measurements.append(m)
-                all_measurements.append(m)
+            # One timestamp per pass, shared by both sensors
+            now = time.monotonic_ns()
+            
+            # Read both sensors concurrently so one sensor's timeout
+            # does not stall the other
+            f1 = pool.submit(sensor1.read_distances)
+            f2 = pool.submit(sensor2.read_distances)
+            dists1, dists2 = f1.result(), f2.result()
+            previous = count
+            
+            # Sensor 1
+            for dist1 in dists1:
+                sensor1.record(dist1)
+                log.append(0, dist1, now)
                 print(f"[Sensor_1] {dist1:6.2f} inches")
-                count += 1
+            count += len(dists1)
             
-            # Read from sensor 2
-            dist2 = sensor2.read_distance()
-            if dist2:
-                m = Measurement("Sensor_2", dist2, time.time())
-                sensor2.measurements.append(m)
-                all_measurements.append(m)
+            # Sensor 2
+            for dist2 in dists2:
+                sensor2.record(dist2)
+                log.append(1, dist2, now)
                 print(f"[Sensor_2] {dist2:6.2f} inches")
-                count += 1
+            count += len(dists2)
             
-            if count % 20 == 0 and count > 0:
+            if count // 20 > previous // 20:
                 print(f"\n>>> Total measurements: {count}\n")
             
             time.sleep(0.01)
@@ -137,28 +169,32 @@ def main():
         print("\n\nStopped by user")
     
     finally:
+        pool.shutdown(wait=True)
+        
         # Save data
         os.makedirs('data', exist_ok=True)
         filename = f'data/ultrasonic_{int(time.time())}.csv'
         
-        with open(filename, 'w', newline='') as f:
+        with open(filename, 'w', newline='', buffering=1 << 20) as f:
             writer = csv.writer(f)
             writer.writerow(['Sensor', 'Distance_Inches', 'Timestamp'])
-            for m in all_measurements:
-                writer.writerow([m.sensor, f"{m.distance_inches:.2f}", f"{m.timestamp:.6f}"])
+            writer.writerows(log.rows(offset_ns=t0_wall_ns - t0_mono_ns))
         
-        print(f"\nSaved {len(all_measurements)} measurements to {filename}")
+        print(f"\nSaved {len(log)} measurements to {filename}")
         
         # Statistics
-        if sensor1.measurements:
-            d = [m.distance_inches for m in sensor1.measurements]
-            print(f"\nSensor 1: {len(d)} readings, avg={sum(d)/len(d):.2f}in, min={min(d):.2f}in, max={max(d):.2f}in")
+        stats = sensor1.statistics()
+        if stats:
+            n, avg, lo, hi = stats
+            print(f"\nSensor 1: {n} readings, avg={avg:.2f}in, min={lo:.2f}in, max={hi:.2f}in")
         
-        if sensor2.measurements:
-            d = [m.distance_inches for m in sensor2.measurements]
-            print(f"Sensor 2: {len(d)} readings, avg={sum(d)/len(d):.2f}in, min={min(d):.2f}in, max={max(d):.2f}in")
+        stats = sensor2.statistics()
+        if stats:
+            n, avg, lo, hi = stats
+            print(f"Sensor 2: {n} readings, avg={avg:.2f}in, min={lo:.2f}in, max={hi:.2f}in")
         
-        GPIO.cleanup()
+        sensor1.ser.close()
+        sensor2.ser.close()
         print("\nDone!")
 
 if __name__ == "__main__":
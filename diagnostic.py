@@ -4,6 +4,7 @@ Diagnostic: Check if MB1300AE sensors are transmitting data
 """
 import time
 import OPi.GPIO as GPIO
+from gpio_fastpath import count_edges, send_pulse
 
 TX_PIN_1 = 12
 TX_PIN_2 = 18
@@ -35,34 +36,17 @@ print(f"   Sensor 2 TX (Pin 18): {GPIO.input(TX_PIN_2)} ({'HIGH' if GPIO.input(T
 print("\n2. Watching for activity on TX pins (5 seconds)...")
 print("   Looking for any state changes...")
 
-start = time.time()
-changes_1 = 0
-changes_2 = 0
-last_1 = GPIO.input(TX_PIN_1)
-last_2 = GPIO.input(TX_PIN_2)
-
-while time.time() - start < 5:
-    curr_1 = GPIO.input(TX_PIN_1)
-    curr_2 = GPIO.input(TX_PIN_2)
-    
-    if curr_1 != last_1:
-        changes_1 += 1
-        if changes_1 <= 3:
-            print(f"   Sensor 1: Change {changes_1} detected")
-        last_1 = curr_1
-        
-    if curr_2 != last_2:
-        changes_2 += 1
-        if changes_2 <= 3:
-            print(f"   Sensor 2: Change {changes_2} detected")
-        last_2 = curr_2
-    
-    time.sleep(0.0001)
-
-print(f"\n   Sensor 1 changes: {changes_1}")
-print(f"   Sensor 2 changes: {changes_2}")
-
-if changes_1 == 0 and changes_2 == 0:
+changes, events = count_edges((TX_PIN_1, TX_PIN_2), 5, max_events=3)
+
+for sensor_num, sensor_events in enumerate(events, 1):
+    for n, _ in enumerate(sensor_events, 1):
+        print(f"   Sensor {sensor_num}: Change {n} detected")
+
+print()
+for sensor_num, sensor_changes in enumerate(changes, 1):
+    print(f"   Sensor {sensor_num} changes: {sensor_changes}")
+
+if not any(changes):
     print("\n❌ NO ACTIVITY on either TX pin!")
     print("\nPossible issues:")
     print("  1. Sensor Pin 5 (TX) NOT connected to Orange Pi Pin 12/18")
@@ -76,24 +60,13 @@ else:
 
 print("\n3. Testing trigger response...")
 print("   Setting RX HIGH to trigger Sensor 1...")
-GPIO.output(RX_PIN_1, GPIO.HIGH)
-time.sleep(0.00003)  # 30us
-GPIO.output(RX_PIN_1, GPIO.LOW)
-
 print("   Watching TX pin for 500ms...")
-start = time.time()
-trigger_changes = 0
-last_state = GPIO.input(TX_PIN_1)
-
-while time.time() - start < 0.5:
-    curr_state = GPIO.input(TX_PIN_1)
-    if curr_state != last_state:
-        trigger_changes += 1
-        if trigger_changes <= 5:
-            elapsed = (time.time() - start) * 1000
-            print(f"   {elapsed:.1f}ms: State change {trigger_changes}")
-        last_state = curr_state
-    time.sleep(0.0001)
+(trigger_changes,), (trigger_events,) = count_edges(
+    (TX_PIN_1,), 0.5, max_events=5,
+    on_armed=lambda: send_pulse(RX_PIN_1, GPIO.HIGH, 30_000))  # 30us HIGH
+
+for n, (elapsed, _) in enumerate(trigger_events, 1):
+    print(f"   {elapsed * 1000:.1f}ms: State change {n}")
 
 print(f"\n   Total changes after trigger: {trigger_changes}")
 
@@ -4,7 +4,7 @@ Example usage script demonstrating different ways to use the ultrasonic sensor c
 """
 
 import time
-import csv
+from itertools import islice
 from ultrasonic_capture import DualSensorController, SensorConfig, PulseWidthMeasurement
 
 
@@ -104,23 +104,25 @@ def example_save_to_csv():
         all_measurements = controller.get_all_measurements()
         
         with open(csv_filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Sensor', 'Cycle', 'Pulse_Number', 'Distance_Inches', 
-                           'Pulse_Width_us', 'Timestamp'])
+            csvfile.write('Sensor,Cycle,Pulse_Number,Distance_Inches,Pulse_Width_us,Timestamp\n')
             
-            cycle = 0
-            for sensor_name, measurements in all_measurements.items():
-                for i, m in enumerate(measurements):
-                    if m.pulse_number == 1:
-                        cycle += 1
-                    writer.writerow([
-                        m.sensor_name,
-                        cycle,
-                        m.pulse_number,
-                        f"{m.distance_inches:.3f}",
-                        f"{m.pulse_width_us:.1f}",
-                        f"{m.timestamp:.6f}"
-                    ])
+            def lines():
+                cycle = 0
+                for measurements in all_measurements.values():
+                    for m in measurements:
+                        if m.pulse_number == 1:
+                            cycle += 1
+                        yield (f"{m.sensor_name},{cycle},{m.pulse_number},"
+                               f"{m.distance_inches:.3f},{m.pulse_width_us:.1f},{m.timestamp:.6f}\n")
+            
+            # No field ever needs quoting, so skip the csv module and write
+            # pre-formatted rows in chunks of 8192
+            rows = lines()
+            while True:
+                chunk = ''.join(islice(rows, 8192))
+                if not chunk:
+                    break
+                csvfile.write(chunk)
         
         print(f"\nData saved to {csv_filename}")
         
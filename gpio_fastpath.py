@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Shared GPIO fast paths for the MB1300 scripts
+Keeps the hot loops in one place with all lookups bound to locals
+
+If the libgpiod Python bindings (python3-libgpiod, v1 API) are installed,
+edge counting uses kernel edge events on /dev/gpiochipN instead of polling.
+Otherwise OPi.GPIO edge callbacks are tried before falling back to polling.
+
+When run as root with /dev/mem access, pin reads and writes in the hot
+loops go straight to the RK3588 GPIO bank registers (fast_input/fast_output).
+OPi.GPIO is still used to set pin direction.
+"""
+
+import time
+import sys
+import os
+import mmap
+from typing import Callable, List, Optional, Sequence, Tuple
+
+try:
+    import OPi.GPIO as GPIO
+except ImportError:
+    print("Error: OPi.GPIO not installed. Install with: pip install OPi.GPIO")
+    sys.exit(1)
+
+try:
+    import gpiod
+except ImportError:
+    gpiod = None
+
+# BOARD pin -> Linux GPIO number on the Orange Pi 5 header (bank * 32 + offset)
+GPIO_NUMBERS = {
+    11: 131,  # GPIO4_A3 (Sensor_1 trigger when pin 16 is UART4 RX)
+    12: 132,  # GPIO4_A4
+    16: 136,  # GPIO4_B0
+    18: 137,  # GPIO4_B1
+    22: 138,  # GPIO4_B2
+}
+
+# BOARD pin -> open /sys/class/gpio/gpioN/value descriptor
+_fd_cache = {}
+
+# RK3588 GPIO bank physical base addresses (Rockchip GPIO v2 controller)
+GPIO_BANK_BASE = {
+    0: 0xFD8A0000,
+    1: 0xFEC20000,
+    2: 0xFEC30000,
+    3: 0xFEC40000,
+    4: 0xFEC50000,
+}
+
+# Register offsets; DR_L/DR_H take a write-enable mask in the upper 16 bits
+_SWPORT_DR_L = 0x00
+_SWPORT_DR_H = 0x04
+_EXT_PORT = 0x70
+
+
+def value_fd(pin: int) -> Optional[int]:
+    """
+    Return a persistent fd for the pin's sysfs value file
+    
+    The pin must already be exported with GPIO.setup(). Returns None if the
+    pin is not on the Orange Pi 5 header map or the file cannot be opened.
+    """
+    fd = _fd_cache.get(pin)
+    if fd is None and pin in GPIO_NUMBERS:
+        try:
+            fd = os.open(f"/sys/class/gpio/gpio{GPIO_NUMBERS[pin]}/value", os.O_RDWR)
+        except OSError:
+            return None
+        _fd_cache[pin] = fd
+    return fd
+
+
+def gpio_in(pin: int) -> int:
+    """Read a pin level through its cached sysfs fd (one pread, no open/close)"""
+    return 1 if os.pread(_fd_cache[pin], 1, 0) == b'1' else 0
+
+
+def gpio_out(pin: int, value: int):
+    """Write a pin level through its cached sysfs fd (one pwrite, no open/close)"""
+    os.pwrite(_fd_cache[pin], b'1' if value else b'0', 0)
+
+
+def close_value_fds():
+    """Close cached sysfs fds (call before GPIO.cleanup() unexports the pins)"""
+    for fd in _fd_cache.values():
+        os.close(fd)
+    _fd_cache.clear()
+
+
+class FastGPIO:
+    """Memory-mapped register access to one RK3588 GPIO bank (needs root)"""
+    
+    MAP_SIZE = 0x1000
+    
+    def __init__(self, bank: int):
+        fd = os.open("/dev/mem", os.O_RDWR | os.O_SYNC)
+        try:
+            self._mem = mmap.mmap(fd, self.MAP_SIZE, offset=GPIO_BANK_BASE[bank])
+        finally:
+            os.close(fd)
+        # 32-bit register view
+        self._regs = memoryview(self._mem).cast('I')
+        
+    def read_bit(self, offset: int) -> int:
+        """Read the input level of one line (0-31) in the bank"""
+        return (self._regs[_EXT_PORT >> 2] >> offset) & 1
+        
+    def write_bit(self, offset: int, value: int):
+        """Drive one output line (0-31) without a read-modify-write"""
+        reg = (_SWPORT_DR_L if offset < 16 else _SWPORT_DR_H) >> 2
+        bit = 1 << (offset & 15)
+        self._regs[reg] = (bit << 16) | (bit if value else 0)
+        
+    def close(self):
+        self._regs.release()
+        self._mem.close()
+
+
+# Bank number -> mapped FastGPIO (None once /dev/mem has been refused)
+_banks = {}
+
+
+def _fast_bank(pin: int) -> Optional[Tuple[FastGPIO, int]]:
+    """Return (bank, line offset) for a header pin, or None if not mappable"""
+    if pin not in GPIO_NUMBERS:
+        return None
+    bank_num, offset = divmod(GPIO_NUMBERS[pin], 32)
+    if bank_num not in _banks:
+        try:
+            _banks[bank_num] = FastGPIO(bank_num)
+        except (OSError, ValueError):
+            _banks[bank_num] = None
+    bank = _banks[bank_num]
+    return (bank, offset) if bank is not None else None
+
+
+def fast_input(pin: int) -> Optional[Callable[[int], int]]:
+    """
+    Return a GPIO.input-compatible reader that loads the bank input register
+    
+    Returns None if the pin cannot be mapped (not root, or no /dev/mem).
+    """
+    mapped = _fast_bank(pin)
+    if mapped is None:
+        return None
+    bank, offset = mapped
+    regs = bank._regs
+    index = _EXT_PORT >> 2
+    
+    def read(_pin: int) -> int:
+        return (regs[index] >> offset) & 1
+    return read
+
+
+def fast_output(pin: int) -> Optional[Callable[[int, int], None]]:
+    """
+    Return a GPIO.output-compatible writer that stores to the bank data register
+    
+    The pin must already be set up as an output. Returns None if the pin
+    cannot be mapped.
+    """
+    mapped = _fast_bank(pin)
+    if mapped is None:
+        return None
+    bank, offset = mapped
+    write_bit = bank.write_bit
+    
+    def write(_pin: int, value: int):
+        write_bit(offset, value)
+    return write
+
+
+# BOARD pin -> gpiod line held as an output by line_output()
+_out_lines = {}
+
+
+def line_output(pin: int, initial: int = 0) -> Optional[Callable[[int, int], None]]:
+    """
+    Return a GPIO.output-compatible writer backed by a gpiod output line
+    
+    The line request is kept for the life of the process, so each write is
+    a single ioctl. The pin is released from OPi.GPIO (sysfs) first; if the
+    request fails it is set up through OPi.GPIO again and None is returned.
+    """
+    if gpiod is None or pin not in GPIO_NUMBERS:
+        return None
+    chip_num, offset = divmod(GPIO_NUMBERS[pin], 32)
+    
+    # Lines exported through sysfs by OPi.GPIO are busy for the chardev
+    GPIO.cleanup(pin)
+    chip = None
+    try:
+        chip = gpiod.Chip(f"gpiochip{chip_num}")
+        line = chip.get_line(offset)
+        line.request(consumer="mb1300-trigger", type=gpiod.LINE_REQ_DIR_OUT, default_vals=[initial])
+    except OSError:
+        if chip is not None:
+            chip.close()
+        GPIO.setup(pin, GPIO.OUT, initial=initial)
+        return None
+    _out_lines[pin] = (chip, line)
+    set_value = line.set_value
+    
+    def write(_pin: int, value: int):
+        set_value(1 if value else 0)
+    return write
+
+
+def close_fast_gpio():
+    """Unmap GPIO banks and release gpiod output lines (their writers become invalid)"""
+    for bank in _banks.values():
+        if bank is not None:
+            bank.close()
+    _banks.clear()
+    
+    for chip, line in _out_lines.values():
+        line.release()
+        chip.close()
+    _out_lines.clear()
+
+
+def _count_edges_events(pins: Tuple[int, ...], duration: float, max_events: int,
+                        on_armed: Optional[Callable[[], None]]) -> Tuple[List[int], List[List[Tuple[float, int]]]]:
+    """Count edges from kernel edge events (all pins must share one gpiochip)"""
+    numbers = [GPIO_NUMBERS[pin] for pin in pins]
+    chips = {num // 32 for num in numbers}
+    if len(chips) != 1:
+        raise ValueError("pins are on different GPIO chips")
+    offsets = [num % 32 for num in numbers]
+    index = {offset: i for i, offset in enumerate(offsets)}
+    
+    changes = [0] * len(pins)
+    events: List[List[Tuple[float, int]]] = [[] for _ in pins]
+    
+    # Lines exported through sysfs by OPi.GPIO are busy for the chardev
+    GPIO.cleanup(list(pins))
+    try:
+        chip = gpiod.Chip(f"gpiochip{chips.pop()}")
+        try:
+            lines = chip.get_lines(offsets)
+            lines.request(consumer="mb1300-diag", type=gpiod.LINE_REQ_EV_BOTH_EDGES)
+            try:
+                start = time.monotonic_ns()
+                if on_armed is not None:
+                    on_armed()
+                deadline = start + int(duration * 1_000_000_000)
+                while True:
+                    remaining = deadline - time.monotonic_ns()
+                    if remaining <= 0:
+                        break
+                    sec, nsec = divmod(remaining, 1_000_000_000)
+                    ready = lines.event_wait(sec=sec, nsec=nsec)
+                    if not ready:
+                        continue
+                    for line in ready:
+                        i = index[line.offset()]
+                        for ev in line.event_read_multiple():
+                            changes[i] += 1
+                            if changes[i] <= max_events:
+                                ts = ev.sec * 1_000_000_000 + ev.nsec
+                                level = 1 if ev.type == gpiod.LineEvent.RISING_EDGE else 0
+                                events[i].append(((ts - start) / 1e9, level))
+            finally:
+                lines.release()
+        finally:
+            chip.close()
+    finally:
+        for pin in pins:
+            GPIO.setup(pin, GPIO.IN)
+            
+    return changes, events
+
+
+def _count_edges_callbacks(pins: Tuple[int, ...], duration: float, max_events: int,
+                           on_armed: Optional[Callable[[], None]]) -> Tuple[List[int], List[List[Tuple[float, int]]]]:
+    """Count edges with OPi.GPIO edge callbacks (sysfs edge + epoll thread)"""
+    index = {pin: i for i, pin in enumerate(pins)}
+    changes = [0] * len(pins)
+    events: List[List[Tuple[float, int]]] = [[] for _ in pins]
+    _input = GPIO.input
+    _mono = time.monotonic_ns
+    start = _mono()
+    
+    def on_edge(channel):
+        i = index[channel]
+        changes[i] += 1
+        if changes[i] <= max_events:
+            events[i].append(((_mono() - start) / 1e9, _input(channel)))
+    
+    armed = []
+    try:
+        for pin in pins:
+            GPIO.add_event_detect(pin, GPIO.BOTH, callback=on_edge)
+            armed.append(pin)
+            
+        start = _mono()
+        if on_armed is not None:
+            on_armed()
+        time.sleep(duration)
+    finally:
+        # Leave the pins with no edge detection so the next watch starts clean
+        for pin in armed:
+            GPIO.remove_event_detect(pin)
+            
+    return changes, events
+
+
+def count_edges(pins: Sequence[int], duration: float, max_events: int = 0,
+                on_armed: Optional[Callable[[], None]] = None) -> Tuple[List[int], List[List[Tuple[float, int]]]]:
+    """
+    Count level changes on one or more input pins
+    
+    Args:
+        pins: BOARD pin numbers to watch (already set up as inputs)
+        duration: Watch time in seconds
+        max_events: Number of changes per pin to record with timestamps
+        on_armed: Called once the pins are being watched (e.g. send a trigger)
+        
+    Returns:
+        (changes, events) indexed like pins; events[i] holds up to max_events
+        (elapsed_seconds, new_level) tuples for pins[i]
+    """
+    pins = tuple(pins)
+    
+    if gpiod is not None and all(pin in GPIO_NUMBERS for pin in pins):
+        fired = []
+
+        def arm():
+            fired.append(True)
+            if on_armed is not None:
+                on_armed()
+
+        try:
+            return _count_edges_events(pins, duration, max_events, arm)
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            # Once the trigger has gone out a fallback would send a second one
+            if fired:
+                raise
+            print(f"   (gpiod edge events unavailable: {e})")
+    
+    if hasattr(GPIO, 'add_event_detect'):
+        try:
+            return _count_edges_callbacks(pins, duration, max_events, on_armed)
+        except (RuntimeError, OSError) as e:
+            print(f"   (GPIO edge detection unavailable: {e}; polling instead)")
+    
+    readers = [fast_input(pin) or GPIO.input for pin in pins]
+    _mono = time.monotonic_ns
+    indices = range(len(pins))
+    
+    last = [read(pin) for read, pin in zip(readers, pins)]
+    changes = [0] * len(pins)
+    events: List[List[Tuple[float, int]]] = [[] for _ in pins]
+    
+    start = _mono()
+    if on_armed is not None:
+        on_armed()
+    deadline = start + int(duration * 1_000_000_000)
+    while _mono() < deadline:
+        for i in indices:
+            curr = readers[i](pins[i])
+            if curr != last[i]:
+                changes[i] += 1
+                if changes[i] <= max_events:
+                    events[i].append(((_mono() - start) / 1e9, curr))
+                last[i] = curr
+                
+    return changes, events
+
+
+def enable_realtime(priority: int, cpu: Optional[int] = None) -> bool:
+    """
+    Run the calling thread under SCHED_FIFO, optionally pinned to one core
+    
+    Threads started afterwards inherit the policy and affinity. Needs root;
+    returns False (default scheduling, affinity untouched) if refused.
+    """
+    # Scheduler first: without root it is the call that fails, and the
+    # process must not be left pinned to one core on default scheduling
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+    except (AttributeError, OSError) as e:
+        print(f"Real-time scheduling unavailable ({e}), using default scheduler")
+        return False
+        
+    if cpu is None:
+        print(f"Running with SCHED_FIFO priority {priority}")
+        return True
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        print(f"Running with SCHED_FIFO priority {priority}, not pinned (CPU {cpu}: {e})")
+        return True
+        
+    print(f"Pinned to CPU {cpu} (SCHED_FIFO priority {priority})")
+    return True
+
+
+def busy_wait_ns(duration_ns: int):
+    """
+    Spin for duration_ns nanoseconds
+    
+    For waits of tens of microseconds (trigger pulses), where time.sleep()
+    overshoots by the scheduler wakeup latency.
+    """
+    _mono = time.monotonic_ns
+    deadline = _mono() + duration_ns
+    while _mono() < deadline:
+        pass
+
+
+def send_pulse(pin: int, active: int, width_ns: int):
+    """
+    Drive an output pin to active for width_ns, then back to the other level
+    
+    Uses the mapped register writer when available and a busy wait for the
+    pulse width.
+    """
+    output = fast_output(pin) or GPIO.output
+    idle = GPIO.LOW if active == GPIO.HIGH else GPIO.HIGH
+    output(pin, active)
+    busy_wait_ns(width_ns)
+    output(pin, idle)
+
+
+def pulse_widths_us(events: Sequence[Tuple[float, int]]) -> List[float]:
+    """
+    Convert (elapsed_seconds, new_level) edges into HIGH pulse widths
+    
+    Returns:
+        Width in microseconds of every rising edge followed by a falling edge
+    """
+    widths = []
+    rise = None
+    for elapsed, level in events:
+        if level:
+            rise = elapsed
+        elif rise is not None:
+            widths.append((elapsed - rise) * 1e6)
+            rise = None
+    return widths
+
@@ -5,6 +5,8 @@ Ultra-simple sensor test - just checks if sensor responds
 import time
 import OPi.GPIO as GPIO
 
+from gpio_fastpath import count_edges, send_pulse
+
 # Pin numbers
 PW_PIN = 12
 TRIGGER_PIN = 16
@@ -25,24 +27,15 @@ time.sleep(0.5)
 # Check if sensor is powered
 print(f"PW pin initial state: {GPIO.input(PW_PIN)} (should be 1)")
 
-# Send trigger (pulse HIGH)
+# Send trigger (pulse HIGH) once the watch is armed
 print("Sending trigger...")
-GPIO.output(TRIGGER_PIN, GPIO.HIGH)
-time.sleep(0.00003)  # 30 microseconds
-GPIO.output(TRIGGER_PIN, GPIO.LOW)
-
-# Watch for any changes
 print("Watching for 200ms...")
-start = time.time()
-changes = 0
-last = GPIO.input(PW_PIN)
-
-while (time.time() - start) < 0.2:
-    current = GPIO.input(PW_PIN)
-    if current != last:
-        changes += 1
-        print(f"  Change {changes}: pin = {current}")
-        last = current
+(changes,), (events,) = count_edges(
+    (PW_PIN,), 0.2, max_events=1000,
+    on_armed=lambda: send_pulse(TRIGGER_PIN, GPIO.HIGH, 30_000))  # 30 microseconds
+
+if events:
+    print("\n".join(f"  Change {n}: pin = {level}" for n, (_, level) in enumerate(events, 1)))
 
 print(f"\nTotal changes: {changes}")
 
@@ -13,6 +13,8 @@ except ImportError:
     print("Error: OPi.GPIO not installed")
     sys.exit(1)
 
+from gpio_fastpath import count_edges, send_pulse
+
 def test_gpio_basic():
     """Test basic GPIO functionality"""
     print("=" * 60)
@@ -70,71 +72,35 @@ def test_gpio_basic():
         GPIO.output(16, GPIO.HIGH)
         GPIO.output(22, GPIO.HIGH)
         
-        # Test Sensor 1
-        print("\n   Testing Sensor 1 (Pin 16 trigger, Pin 12 input):")
-        print("   - Setting trigger HIGH (idle)")
-        GPIO.output(16, GPIO.HIGH)
-        time.sleep(0.1)
-        
-        print("   - Reading PW pin before trigger:", GPIO.input(12))
-        
-        print("   - Sending trigger pulse (LOW for 25us)...")
-        GPIO.output(16, GPIO.LOW)
-        time.sleep(0.000025)
-        GPIO.output(16, GPIO.HIGH)
-        
-        print("   - Waiting for pulse response...")
-        start_time = time.time()
         timeout = 0.1  # 100ms timeout
         
-        # Wait for any change on PW pin
-        initial_state = GPIO.input(12)
-        response_detected = False
-        
-        while time.time() - start_time < timeout:
-            if GPIO.input(12) != initial_state:
-                response_detected = True
-                print("   ✓ Sensor 1 RESPONDED!")
-                break
-            time.sleep(0.0001)
-        
-        if not response_detected:
-            print("   ✗ Sensor 1 NO RESPONSE")
-            print(f"     Initial state: {initial_state}")
-            print(f"     Final state: {GPIO.input(12)}")
-        
-        time.sleep(0.1)
-        
-        # Test Sensor 2
-        print("\n   Testing Sensor 2 (Pin 22 trigger, Pin 18 input):")
-        print("   - Setting trigger HIGH (idle)")
-        GPIO.output(22, GPIO.HIGH)
-        time.sleep(0.1)
-        
-        print("   - Reading PW pin before trigger:", GPIO.input(18))
-        
-        print("   - Sending trigger pulse (LOW for 25us)...")
-        GPIO.output(22, GPIO.LOW)
-        time.sleep(0.000025)
-        GPIO.output(22, GPIO.HIGH)
-        
-        print("   - Waiting for pulse response...")
-        start_time = time.time()
-        
-        initial_state = GPIO.input(18)
-        response_detected = False
-        
-        while time.time() - start_time < timeout:
-            if GPIO.input(18) != initial_state:
-                response_detected = True
-                print("   ✓ Sensor 2 RESPONDED!")
-                break
-            time.sleep(0.0001)
-        
-        if not response_detected:
-            print("   ✗ Sensor 2 NO RESPONSE")
-            print(f"     Initial state: {initial_state}")
-            print(f"     Final state: {GPIO.input(18)}")
+        for sensor_num, (trigger_pin, pw_pin) in enumerate([(16, 12), (22, 18)], 1):
+            if sensor_num > 1:
+                time.sleep(0.1)
+            
+            print(f"\n   Testing Sensor {sensor_num} (Pin {trigger_pin} trigger, Pin {pw_pin} input):")
+            print("   - Setting trigger HIGH (idle)")
+            GPIO.output(trigger_pin, GPIO.HIGH)
+            time.sleep(0.1)
+            
+            print("   - Reading PW pin before trigger:", GPIO.input(pw_pin))
+            
+            print("   - Sending trigger pulse (LOW for 25us)...")
+            print("   - Waiting for pulse response...")
+            
+            # Watch for any change on PW pin, triggering once armed
+            initial_state = GPIO.input(pw_pin)
+            (changes,), _ = count_edges(
+                (pw_pin,), timeout,
+                on_armed=lambda: send_pulse(trigger_pin, GPIO.LOW, 25_000))
+            response_detected = changes > 0
+            
+            if response_detected:
+                print(f"   ✓ Sensor {sensor_num} RESPONDED!")
+            else:
+                print(f"   ✗ Sensor {sensor_num} NO RESPONSE")
+                print(f"     Initial state: {initial_state}")
+                print(f"     Final state: {GPIO.input(pw_pin)}")
         
         print("\n" + "=" * 60)
         print("TROUBLESHOOTING TIPS:")
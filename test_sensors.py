@@ -13,12 +13,17 @@ except ImportError:
     print("Error: OPi.GPIO not installed")
     sys.exit(1)
 
+from gpio_fastpath import count_edges, pulse_widths_us, send_pulse
+
 # Pin configuration (using BOARD numbering)
 SENSOR1_PW = 12      # GPIO4_A4 (132)
 SENSOR1_TRIGGER = 16 # GPIO4_B0 (136)
 SENSOR2_PW = 18      # GPIO4_B1 (137)
 SENSOR2_TRIGGER = 22 # GPIO4_B2 (138)
 
+PULSE_WIDTH_US_PER_INCH = 147  # MB1300 PW output scaling
+INCHES_PER_US = 1.0 / PULSE_WIDTH_US_PER_INCH
+
 def test_single_sensor(pw_pin, trigger_pin, sensor_name):
     """Test a single sensor"""
     print(f"\n{'='*60}")
@@ -48,29 +53,21 @@ def test_single_sensor(pw_pin, trigger_pin, sensor_name):
             print("   Check: Is PW connected? (sensor Pin 2 to Orange Pi)")
             return False
         
-        print("\nSending trigger pulse...")
-        GPIO.output(trigger_pin, GPIO.LOW)
-        time.sleep(0.000025)  # 25 microseconds
-        GPIO.output(trigger_pin, GPIO.HIGH)
+        print("\nSending trigger pulse and monitoring PW pin for 100ms...")
         
-        print("Trigger sent, monitoring PW pin for 100ms...")
+        # Edges are timestamped by the kernel when gpiod is available
+        (change_count,), (state_changes,) = count_edges(
+            (pw_pin,), 0.1, max_events=20,
+            on_armed=lambda: send_pulse(trigger_pin, GPIO.LOW, 25_000))  # 25us LOW
         
-        # Monitor for state changes
-        start_time = time.time()
-        state_changes = []
-        last_state = GPIO.input(pw_pin)
-        change_count = 0
+        for elapsed, level in state_changes[:5]:  # Don't spam output
+            print(f"  {elapsed * 1000:.2f}ms: Pin changed to {'HIGH' if level else 'LOW'}")
         
-        while time.time() - start_time < 0.1:  # 100ms
-            current_state = GPIO.input(pw_pin)
-            if current_state != last_state:
-                change_count += 1
-                timestamp = (time.time() - start_time) * 1000  # ms
-                state_changes.append((timestamp, 'HIGH' if current_state else 'LOW'))
-                last_state = current_state
-                if change_count <= 5:  # Don't spam output
-                    print(f"  {timestamp:.2f}ms: Pin changed to {'HIGH' if current_state else 'LOW'}")
-            time.sleep(0.0001)  # 0.1ms polling
+        widths = pulse_widths_us(state_changes)
+        if widths:
+            print("Pulse widths:")
+            for width in widths[:5]:
+                print(f"  {width:8.1f}us = {width * INCHES_PER_US:6.2f} in")
         
         print(f"\nTotal state changes detected: {change_count}")
         
@@ -3,13 +3,16 @@
 Raw UART test - Check if any data is coming from sensors
 """
 
-import serial
+import selectors
 import time
+import serial
 
-def test_uart(port, name):
-    """Test a UART port for any incoming data"""
+LISTEN_SECONDS = 10
+
+def open_uart(port, name):
+    """Open a UART port for listening, or return None on failure"""
     print(f"\n{'='*60}")
-    print(f"Testing {name}: {port}")
+    print(f"Opening {name}: {port}")
     print(f"{'='*60}")
     
     try:
@@ -19,55 +22,63 @@ def test_uart(port, name):
             bytesize=serial.EIGHTBITS,
             parity=serial.PARITY_NONE,
             stopbits=serial.STOPBITS_ONE,
-            timeout=2.0
+            timeout=0
         )
-        
-        print(f"✓ Port opened successfully")
-        print(f"Listening for 10 seconds...")
-        print(f"(Sensor should output data ~10 times per second)")
-        
-        ser.reset_input_buffer()
-        
-        start_time = time.time()
-        byte_count = 0
-        line_count = 0
-        
-        while time.time() - start_time < 10:
-            if ser.in_waiting > 0:
-                data = ser.read(ser.in_waiting)
-                byte_count += len(data)
-                
-                # Try to decode and display
-                try:
-                    text = data.decode('ascii', errors='replace')
-                    print(f"  Received: {repr(text)} ({len(data)} bytes)")
-                    line_count += text.count('\r')
-                except:
-                    print(f"  Received: {data.hex()} ({len(data)} bytes)")
-            
-            time.sleep(0.1)
-        
-        ser.close()
-        
-        print(f"\nResults:")
-        print(f"  Total bytes received: {byte_count}")
-        print(f"  Total lines received: {line_count}")
-        print(f"  Expected: ~100 bytes (10 readings)")
-        
-        if byte_count == 0:
-            print(f"\n⚠ NO DATA RECEIVED!")
-            print(f"  Possible causes:")
-            print(f"  1. Sensor Pin 1 (BW) not connected HIGH - must be 3.3V or 5V")
-            print(f"  2. Sensor Pin 5 (TX) not connected to Orange Pi")
-            print(f"  3. Sensor not powered (Pin 6 to 5V, Pin 7 to GND)")
-            print(f"  4. Wrong UART port mapping")
-        elif byte_count < 50:
-            print(f"\n⚠ LOW DATA RATE - possible connection issue")
-        else:
-            print(f"\n✓ Sensor appears to be working!")
-            
     except Exception as e:
         print(f"✗ Error: {e}")
+        return None
+        
+    print(f"✓ Port opened successfully")
+    ser.reset_input_buffer()
+    return ser
+
+def listen(ports, duration):
+    """Collect data from all open ports at once; returns {name: bytes}"""
+    received = {name: bytearray() for name in ports}
+    
+    # One wait serves every port, so all sensors share the same listen window
+    with selectors.DefaultSelector() as sel:
+        for name, ser in ports.items():
+            sel.register(ser, selectors.EVENT_READ, data=name)
+            
+        deadline = time.monotonic() + duration
+        while (remaining := deadline - time.monotonic()) > 0:
+            for key, _ in sel.select(timeout=min(remaining, 1.0)):
+                ser = key.fileobj
+                received[key.data] += ser.read(ser.in_waiting or 1)
+                
+    return received
+
+def report(name, data):
+    """Print the frames and verdict for one sensor"""
+    print(f"\n{'='*60}")
+    print(f"Results for {name}")
+    print(f"{'='*60}")
+    
+    byte_count = len(data)
+    line_count = data.count(b'\r')
+    
+    # Display each received frame
+    for frame in data.splitlines(keepends=True):
+        text = frame.decode('ascii', errors='replace')
+        print(f"  Received: {repr(text)} ({len(frame)} bytes)")
+    
+    print(f"\nResults:")
+    print(f"  Total bytes received: {byte_count}")
+    print(f"  Total lines received: {line_count}")
+    print(f"  Expected: ~100 bytes (10 readings)")
+    
+    if byte_count == 0:
+        print(f"\n⚠ NO DATA RECEIVED!")
+        print(f"  Possible causes:")
+        print(f"  1. Sensor Pin 1 (BW) not connected HIGH - must be 3.3V or 5V")
+        print(f"  2. Sensor Pin 5 (TX) not connected to Orange Pi")
+        print(f"  3. Sensor not powered (Pin 6 to 5V, Pin 7 to GND)")
+        print(f"  4. Wrong UART port mapping")
+    elif byte_count < 50:
+        print(f"\n⚠ LOW DATA RATE - possible connection issue")
+    else:
+        print(f"\n✓ Sensor appears to be working!")
 
 def main():
     print("="*60)
@@ -77,8 +88,25 @@ def main():
     print("Each sensor should output ~10 readings per second")
     print("Format: 'Rxxx\\r' where xxx is distance in cm\n")
     
-    test_uart("/dev/ttyS4", "Sensor 1 (Pin 16 - UART4)")
-    test_uart("/dev/ttyS3", "Sensor 2 (Pin 21 - UART3)")
+    ports = {}
+    for port, name in [("/dev/ttyS4", "Sensor 1 (Pin 16 - UART4)"),
+                       ("/dev/ttyS3", "Sensor 2 (Pin 21 - UART3)")]:
+        ser = open_uart(port, name)
+        if ser is not None:
+            ports[name] = ser
+    
+    if ports:
+        print(f"\nListening on {len(ports)} port(s) for {LISTEN_SECONDS} seconds...")
+        print(f"(Sensor should output data ~10 times per second)")
+        
+        try:
+            received = listen(ports, LISTEN_SECONDS)
+        finally:
+            for ser in ports.values():
+                ser.close()
+        
+        for name, data in received.items():
+            report(name, data)
     
     print("\n" + "="*60)
     print("IMPORTANT: Sensor Pin 1 (BW) MUST be connected to 3.3V or 5V")
@@ -5,6 +5,8 @@ Test both trigger methods for MB1300
 import time
 import OPi.GPIO as GPIO
 
+from gpio_fastpath import count_edges, send_pulse
+
 PW_PIN = 12
 TRIGGER_PIN = 16
 
@@ -16,16 +18,11 @@ GPIO.setwarnings(False)
 GPIO.setup(TRIGGER_PIN, GPIO.OUT)
 GPIO.setup(PW_PIN, GPIO.IN)
 
-def watch_changes(duration=0.2):
-    """Watch for pin changes"""
-    start = time.time()
-    changes = 0
-    last = GPIO.input(PW_PIN)
-    while (time.time() - start) < duration:
-        current = GPIO.input(PW_PIN)
-        if current != last:
-            changes += 1
-            last = current
+def watch_changes(duration=0.2, trigger=None):
+    """Watch for pin changes (trigger is sent once the watch is armed)"""
+    # Kernel edge events via gpiod when available, so short pulses are not
+    # missed between polls; the watch is re-armed fresh for every test
+    (changes,), _ = count_edges((PW_PIN,), duration, on_armed=trigger)
     return changes
 
 # Test 1: HIGH to LOW pulse (RX pin trigger)
@@ -33,10 +30,7 @@ print("\n1. Testing RX trigger (HIGH->LOW->HIGH)...")
 GPIO.output(TRIGGER_PIN, GPIO.HIGH)
 time.sleep(0.1)
 print(f"   Before: PW={GPIO.input(PW_PIN)}")
-GPIO.output(TRIGGER_PIN, GPIO.LOW)
-time.sleep(0.00002)  # 20us LOW
-GPIO.output(TRIGGER_PIN, GPIO.HIGH)
-changes1 = watch_changes(0.2)
+changes1 = watch_changes(0.2, lambda: send_pulse(TRIGGER_PIN, GPIO.LOW, 20_000))  # 20us LOW
 print(f"   Changes: {changes1}")
 
 time.sleep(0.5)
@@ -46,10 +40,7 @@ print("\n2. Testing inverted trigger (LOW->HIGH->LOW)...")
 GPIO.output(TRIGGER_PIN, GPIO.LOW)
 time.sleep(0.1)
 print(f"   Before: PW={GPIO.input(PW_PIN)}")
-GPIO.output(TRIGGER_PIN, GPIO.HIGH)
-time.sleep(0.00002)  # 20us HIGH
-GPIO.output(TRIGGER_PIN, GPIO.LOW)
-changes2 = watch_changes(0.2)
+changes2 = watch_changes(0.2, lambda: send_pulse(TRIGGER_PIN, GPIO.HIGH, 20_000))  # 20us HIGH
 print(f"   Changes: {changes2}")
 
 time.sleep(0.5)
@@ -59,10 +50,7 @@ print("\n3. Testing longer LOW pulse (100us)...")
 GPIO.output(TRIGGER_PIN, GPIO.HIGH)
 time.sleep(0.1)
 print(f"   Before: PW={GPIO.input(PW_PIN)}")
-GPIO.output(TRIGGER_PIN, GPIO.LOW)
-time.sleep(0.0001)  # 100us LOW
-GPIO.output(TRIGGER_PIN, GPIO.HIGH)
-changes3 = watch_changes(0.2)
+changes3 = watch_changes(0.2, lambda: send_pulse(TRIGGER_PIN, GPIO.LOW, 100_000))  # 100us LOW
 print(f"   Changes: {changes3}")
 
 time.sleep(0.5)
@@ -1,16 +1,24 @@
 #!/usr/bin/env python3
 """
 Orange Pi 5 MaxBotix MB1300AE Ultrasonic Sensor Controller
-Uses software serial to read TX output from sensors (9600 baud)
+Uses software serial to read TX output from sensors (9600 baud), or a
+kernel UART per sensor when mapped with MB1300_UART_PORTS (see UART_PORTS)
 """
 
 import time
 import sys
 import csv
 import os
-from dataclasses import dataclass
-from typing import List, Optional
+import re
+import heapq
 from collections import deque
+from functools import partial
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, repeat
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 
 try:
     import OPi.GPIO as GPIO
@@ -18,16 +26,55 @@ except ImportError:
     print("Error: OPi.GPIO not installed. Install with: pip install OPi.GPIO")
     sys.exit(1)
 
+import serial
+
+from gpio_fastpath import (value_fd, gpio_in, close_value_fds, fast_input, fast_output, line_output,
+                           close_fast_gpio, busy_wait_ns, enable_realtime)
+
+
+# Offset from time.monotonic_ns() to epoch ns, fixed at startup so stored
+# timestamps are immune to wall-clock steps but still export as epoch time
+MONOTONIC_TO_EPOCH_NS = time.time_ns() - time.monotonic_ns()
+
+def _pin_map_from_env(var: str, convert=str) -> dict:
+    """Parse "pin=value,pin=value" from the environment into {pin: convert(value)}"""
+    mapping = {}
+    for entry in filter(None, (part.strip() for part in os.environ.get(var, "").split(","))):
+        pin, sep, value = entry.partition("=")
+        try:
+            if not sep or not value.strip():
+                raise ValueError(entry)
+            mapping[int(pin)] = convert(value.strip())
+        except ValueError:
+            print(f"Warning: ignoring malformed {var} entry {entry!r} (expected pin=value)")
+    return mapping
+
+
+# Per-sensor overrides, keyed by the sensor's default TX pin in main()
+# (12 = Sensor_1, 18 = Sensor_2). Pins 12 and 18 are plain GPIO on the
+# Orange Pi 5 header, so by default both sensors use software serial. When a
+# sensor's TX is wired to a UART RX pin instead (uart4-m0/uart3-m0 overlays,
+# see check_uart.py), map it to the port with MB1300_UART_PORTS. Sensor_1's
+# default trigger is pin 16, which is UART4's RX, so move its trigger with
+# MB1300_TRIGGER_PINS as in PINOUT.md:
+#   MB1300_UART_PORTS="12=/dev/ttyS4,18=/dev/ttyS3" MB1300_TRIGGER_PINS="12=11"
+UART_PORTS = _pin_map_from_env("MB1300_UART_PORTS")
+TRIGGER_PINS = _pin_map_from_env("MB1300_TRIGGER_PINS", int)
+
+# Header pin each kernel UART receives on (M0 mux)
+UART_RX_PINS = {'/dev/ttyS4': 16, '/dev/ttyS3': 21}
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SensorConfig:
     """Configuration for a single MB1300AE sensor"""
     name: str
     tx_pin: int      # Pin 5 (TX) - Serial output
     rx_pin: int      # Pin 4 (RX) - Trigger control
+    uart_port: Optional[str] = None  # Hardware UART wired to TX (e.g. '/dev/ttyS3'); software serial if None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RangeMeasurement:
     """Single range measurement from sensor"""
     distance_inches: float
@@ -43,49 +90,88 @@ class SoftwareSerial:
     BAUD_RATE = 9600
     BIT_DURATION = 1.0 / BAUD_RATE  # ~104 microseconds
     
+    BIT_DURATION_NS = 1_000_000_000 // BAUD_RATE
+    
+    # Sample points (ns) measured from the start-bit falling edge: middle of
+    # the start bit, each of the 8 data bits, and the stop bit
+    START_SAMPLE_NS = BIT_DURATION_NS // 2
+    STOP_SAMPLE_NS = 19 * BIT_DURATION_NS // 2
+    DATA_SAMPLES_NS = tuple(range(START_SAMPLE_NS + BIT_DURATION_NS, STOP_SAMPLE_NS, BIT_DURATION_NS))
+    
+    # Waits shorter than this are spun: time.sleep() overshoots sub-millisecond
+    # targets by the scheduler wakeup latency, which is about half a bit time
+    SPIN_THRESHOLD_NS = 1_000_000
+    
+    FRAME_DIGITS = 3  # "Rxxx\r": longer runs are corrupt and would overflow the uint16 columns
+    
     def __init__(self, rx_pin: int):
         self.rx_pin = rx_pin
         GPIO.setup(rx_pin, GPIO.IN)
+        # Prefer the mapped input register, then a kept-open sysfs value file,
+        # then GPIO.input
+        self._input = fast_input(rx_pin)
+        if self._input is None:
+            self._input = gpio_in if value_fd(rx_pin) is not None else GPIO.input
+        
+    def _sleep_until(self, deadline_ns: int):
+        """Wait until an absolute time.monotonic_ns() deadline"""
+        _mono = time.monotonic_ns
+        remaining = deadline_ns - _mono()
+        if remaining > self.SPIN_THRESHOLD_NS:
+            time.sleep((remaining - self.SPIN_THRESHOLD_NS) / 1e9)
+        while _mono() < deadline_ns:
+            pass
         
     def read_byte(self, timeout_ms: float = 100) -> Optional[int]:
         """Read one byte using software serial (8N1 format)"""
-        start_time = time.time()
-        timeout_sec = timeout_ms / 1000.0
+        # Bind hot lookups to locals (LOAD_FAST instead of global/attr lookups)
+        _input = self._input
+        _mono = time.monotonic_ns
+        sleep_until = self._sleep_until
+        pin = self.rx_pin
+        high = GPIO.HIGH
+        
+        deadline = _mono() + int(timeout_ms * 1_000_000)
         
         # Wait for start bit (HIGH to LOW transition)
-        while GPIO.input(self.rx_pin) == GPIO.HIGH:
-            if time.time() - start_time > timeout_sec:
+        while _input(pin) == high:
+            if _mono() > deadline:
                 return None
+        
+        # Every sample is scheduled relative to the edge rather than chained
+        # sleeps, so per-bit interpreter overhead does not accumulate as drift
+        edge = _mono()
                 
-        # Wait half a bit period to sample in middle of start bit
-        time.sleep(self.BIT_DURATION / 2)
+        # Sample in middle of start bit
+        sleep_until(edge + self.START_SAMPLE_NS)
         
-        if GPIO.input(self.rx_pin) != GPIO.LOW:
+        if _input(pin) != GPIO.LOW:
             return None  # False start bit
             
         # Read 8 data bits (LSB first)
         byte_value = 0
-        for bit_num in range(8):
-            time.sleep(self.BIT_DURATION)
-            if GPIO.input(self.rx_pin) == GPIO.HIGH:
+        for bit_num, offset in enumerate(self.DATA_SAMPLES_NS):
+            sleep_until(edge + offset)
+            if _input(pin) == high:
                 byte_value |= (1 << bit_num)
                 
         # Wait for stop bit
-        time.sleep(self.BIT_DURATION)
+        sleep_until(edge + self.STOP_SAMPLE_NS)
         
         return byte_value
         
     def read_line(self, timeout_ms: float = 200) -> Optional[str]:
         """Read a line of text ending with \\r"""
         line = []
-        start_time = time.time()
-        timeout_sec = timeout_ms / 1000.0
+        _mono = time.monotonic_ns
+        read_byte = self.read_byte
+        deadline = _mono() + int(timeout_ms * 1_000_000)
         
         while True:
-            if time.time() - start_time > timeout_sec:
+            if _mono() > deadline:
                 return None
                 
-            byte = self.read_byte(timeout_ms=50)
+            byte = read_byte(timeout_ms=50)
             if byte is None:
                 continue
                 
@@ -96,6 +182,176 @@ class SoftwareSerial:
                 line.append(chr(byte))
                 
         return ''.join(line) if line else None
+        
+    def read_range(self, timeout_ms: float = 200) -> Optional[int]:
+        """
+        Read one "Rxxx\\r" frame and return xxx
+        
+        Digits are accumulated as integers while the bytes arrive, so no
+        string is built or parsed. Noise, including a frame with more than
+        FRAME_DIGITS digits, resynchronizes on the next 'R'.
+        """
+        _mono = time.monotonic_ns
+        read_byte = self.read_byte
+        deadline = _mono() + int(timeout_ms * 1_000_000)
+        
+        value = 0
+        digits = -1  # -1 until an 'R' starts a frame
+        while _mono() <= deadline:
+            byte = read_byte(timeout_ms=50)
+            if byte is None:
+                continue
+                
+            if byte == 0x52:  # 'R'
+                value = 0
+                digits = 0
+            elif byte == 0x0D:  # CR
+                if digits > 0:
+                    return value
+                digits = -1
+            elif 0 <= digits < self.FRAME_DIGITS and 0x30 <= byte <= 0x39:  # '0'-'9'
+                value = value * 10 + (byte - 0x30)
+                digits += 1
+            else:
+                digits = -1
+                
+        return None
+        
+    def read_frames(self, count: int, timeout_ms: float = 200) -> Tuple[List[int], List[int]]:
+        """
+        Read up to count "Rxxx" frames, allowing timeout_ms per frame
+        
+        Returns (ranges, timestamps_ns): each frame is stamped with
+        time.monotonic_ns() as soon as its terminating CR has been read.
+        """
+        read_range = self.read_range
+        _mono = time.monotonic_ns
+        ranges = []
+        timestamps_ns = []
+        for _ in range(count):
+            value = read_range(timeout_ms=timeout_ms)
+            if value is not None:
+                timestamps_ns.append(_mono())
+                ranges.append(value)
+        return ranges, timestamps_ns
+        
+    def discard(self):
+        """Drop buffered frames; nothing is buffered when bit-banging"""
+
+
+class UartSerial:
+    """Hardware UART reader for 9600 baud with the same interface as SoftwareSerial
+    
+    A background thread owns the port and parses "Rxxx\\r" frames into a
+    bounded deque as they arrive, stamping each with its arrival time, so
+    the trigger path only drains parsed ranges instead of blocking on the
+    read itself.
+    """
+    
+    FRAME_SIZE = 5  # "Rxxx\r"
+    FRAME_RE = re.compile(rb'R(\d{3})\r')  # 'R' + 3 ASCII digits + CR
+    MAX_QUEUED_FRAMES = 64  # Parsed frames kept for the consumer (oldest dropped)
+    MAX_PARTIAL = 64        # Drop an unterminated tail longer than this (not ASCII output)
+    
+    def __init__(self, port: str):
+        self.port = serial.Serial(port, 9600, timeout=0.2)
+        # Ask the driver to push each received byte to the tty layer right
+        # away (ASYNC_LOW_LATENCY); Linux only, and not every driver allows it
+        try:
+            self.port.set_low_latency_mode(True)
+        except (AttributeError, OSError, ValueError):
+            pass
+        self.port.reset_input_buffer()
+        
+        # Single producer (reader thread), single consumer (capture thread):
+        # deque append/popleft are atomic, so no lock; the event only wakes
+        # a consumer waiting on an empty queue
+        self._frames = deque(maxlen=self.MAX_QUEUED_FRAMES)
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._reader = threading.Thread(target=self._read_loop, name=f"uart-{port}", daemon=True)
+        self._reader.start()
+        
+    def _read_loop(self):
+        """Reader thread: parse complete frames into the queue until closed"""
+        port = self.port
+        finditer = self.FRAME_RE.finditer
+        max_partial = self.MAX_PARTIAL
+        push = self._frames.append
+        ready = self._ready
+        stop = self._stop
+        _mono = time.monotonic_ns
+        pending = b''
+        
+        while not stop.is_set():
+            try:
+                # Blocks (GIL released) for up to the port timeout
+                data = port.read(port.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError):
+                break  # Port closed underneath us
+            if not data:
+                continue
+                
+            # Arrival time of this read; frames completed by it get this stamp
+            arrived_ns = _mono()
+            pending += data
+            end = pending.rfind(b'\r') + 1
+            if end:
+                for m in finditer(pending, 0, end):
+                    push((int(m.group(1)), arrived_ns))
+                # Keep only the partial frame after the last terminator
+                pending = pending[end:]
+                ready.set()
+            if len(pending) > max_partial:
+                # No CR in sight (binary output or line noise): do not let
+                # the buffer grow without bound
+                pending = b''
+                
+    def read_line(self, timeout_ms: float = 200) -> Optional[str]:
+        """Read a line of text ending with \\r"""
+        ranges, _ = self.read_frames(1, timeout_ms)
+        return f"R{ranges[0]:03d}" if ranges else None
+        
+    def read_frames(self, count: int, timeout_ms: float = 200) -> Tuple[List[int], List[int]]:
+        """
+        Take up to count parsed frames, waiting up to timeout_ms per frame
+        
+        Returns (ranges, timestamps_ns); each frame carries the
+        time.monotonic_ns() stamp the reader thread took when it arrived.
+        """
+        frames = self._frames
+        ready = self._ready
+        ranges = []
+        timestamps_ns = []
+        deadline = time.monotonic() + count * timeout_ms / 1000.0
+        
+        while len(ranges) < count:
+            try:
+                value, arrived_ns = frames.popleft()
+                ranges.append(value)
+                timestamps_ns.append(arrived_ns)
+                continue
+            except IndexError:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Clear before re-checking so a frame pushed in between still wakes us
+            ready.clear()
+            if not frames:
+                ready.wait(remaining)
+                
+        return ranges, timestamps_ns
+        
+    def discard(self):
+        """Drop queued frames (leftovers, late or free-running output) before a new trigger"""
+        self._frames.clear()
+        self._ready.clear()
+        
+    def close(self):
+        self._stop.set()
+        self._reader.join()
+        self.port.close()
 
 
 class MB1300Sensor:
@@ -107,25 +363,129 @@ class MB1300Sensor:
     
     def __init__(self, config: SensorConfig):
         self.config = config
-        self.measurements = deque(maxlen=self.MAX_MEASUREMENTS)
         self.serial = None
+        self._set_high = partial(GPIO.output, config.rx_pin, GPIO.HIGH)
+        self._set_low = partial(GPIO.output, config.rx_pin, GPIO.LOW)
+        self._trigger_ns = self.TRIGGER_DURATION_US * 1000
+        
+        # Ring buffer stored as one packed column per field (struct of arrays).
+        # Single writer (the thread capturing this sensor) and no lock: rows
+        # are written first and _head/_count advanced afterwards. Readers take
+        # one _head/_count snapshot so their columns stay aligned, but once
+        # the ring has wrapped a new batch overwrites the oldest rows, so read
+        # rows()/measurements only while capture is stopped
+        n = self.MAX_MEASUREMENTS
+        self._dist = array('f', [0.0]) * n
+        self._raw = array('H', [0]) * n
+        self._ts = array('q', [0]) * n  # time.monotonic_ns()
+        self._cycle = array('I', [0]) * n
+        self._pulse = array('H', [0]) * n
+        self._head = 0   # Next slot to write
+        self._count = 0  # Total measurements stored (including overwritten)
+        
+    def __len__(self) -> int:
+        """Number of measurements currently held in the ring buffer"""
+        return min(self._count, self.MAX_MEASUREMENTS)
+        
+    def _store_batch(self, ranges: List[int], timestamps_ns: List[int], cycle: int):
+        """Write one pulse series (pulse numbers 1..n) into the ring buffer columns"""
+        size = self.MAX_MEASUREMENTS
+        n = len(ranges)
+        first_pulse = 1
+        if n > size:
+            # Only the newest rows fit
+            first_pulse = n - size + 1
+            ranges, timestamps_ns, n = ranges[-size:], timestamps_ns[-size:], size
+            
+        # Convert each field to a packed array once, then block-copy it into
+        # its column (split in two where the batch wraps past the end)
+        columns = (
+            (self._dist, array('f', ranges)),
+            (self._raw, array('H', ranges)),
+            (self._ts, array('q', timestamps_ns)),
+            (self._cycle, array('I', [cycle]) * n),
+            (self._pulse, array('H', range(first_pulse, first_pulse + n))),
+        )
+        head = self._head
+        first = min(n, size - head)
+        for column, values in columns:
+            # Assign through a memoryview: an in-place copy, allowed while
+            # readers hold views of the column
+            view = memoryview(column)
+            view[head:head + first] = values[:first]
+            view[:n - first] = values[first:]
+            
+        # Publish the batch only after every row is written
+        self._head = (head + n) % size
+        self._count += n
+        
+    def _ordered_columns(self, *columns: array):
+        """Iterate the columns' valid entries, oldest first (zero-copy views)"""
+        # Read head and count once so every column covers the same rows
+        head, count = self._head, self._count
+        views = [memoryview(column) for column in columns]
+        if count <= self.MAX_MEASUREMENTS:
+            return [iter(view[:count]) for view in views]
+        return [chain(view[head:], view[:head]) for view in views]
+        
+    def rows(self, label: str):
+        """Yield (monotonic_ns, label, cycle, pulse_number, distance, raw_value), oldest first"""
+        ts, cycle, pulse, dist, raw = self._ordered_columns(
+            self._ts, self._cycle, self._pulse, self._dist, self._raw)
+        return zip(ts, repeat(label), cycle, pulse, dist, raw)
+        
+    @property
+    def measurements(self) -> List[RangeMeasurement]:
+        """All stored measurements, oldest first"""
+        return [
+            RangeMeasurement(distance, raw, (ts + MONOTONIC_TO_EPOCH_NS) / 1e9, cycle, pulse)
+            for distance, raw, ts, cycle, pulse in zip(*self._ordered_columns(
+                self._dist, self._raw, self._ts, self._cycle, self._pulse))
+        ]
+        
+    def statistics(self) -> Optional[Tuple[int, float, float, float]]:
+        """Return (count, min, max, average) distance in inches, or None if empty"""
+        n = len(self)
+        if n == 0:
+            return None
+        # Reduce over the integer readings (distance is float(raw)): int
+        # items avoid a float allocation each and the sum is exact
+        valid = memoryview(self._raw)[:n]
+        return n, float(min(valid)), float(max(valid)), sum(valid) / n
         
     def setup_gpio(self):
         """Initialize GPIO pins"""
         # RX pin (trigger) - Start LOW to stop continuous ranging
         GPIO.setup(self.config.rx_pin, GPIO.OUT, initial=GPIO.LOW)
-        
-        # TX pin for software serial reading
-        self.serial = SoftwareSerial(self.config.tx_pin)
+        # Trigger writes: mapped register, else a held gpiod line, else OPi.GPIO
+        output = (fast_output(self.config.rx_pin)
+                  or line_output(self.config.rx_pin, GPIO.LOW)
+                  or GPIO.output)
+        # Bind pin and level once so trigger() makes no lookups
+        self._set_high = partial(output, self.config.rx_pin, GPIO.HIGH)
+        self._set_low = partial(output, self.config.rx_pin, GPIO.LOW)
+        
+        # TX output via the kernel UART if wired to one; bit-bang software
+        # serial only if there is no UART or it cannot be opened
+        self.serial = None
+        if self.config.uart_port:
+            try:
+                self.serial = UartSerial(self.config.uart_port)
+            except serial.SerialException as e:
+                print(f"{self.config.name}: cannot open {self.config.uart_port} ({e}), using software serial")
+                
+        if self.serial is None:
+            self.serial = SoftwareSerial(self.config.tx_pin)
         
         print(f"GPIO initialized for {self.config.name}")
         
     def trigger(self):
         """Trigger sensor by pulsing RX pin HIGH"""
-        # Pulse RX HIGH for at least 20μs to trigger ranging
-        GPIO.output(self.config.rx_pin, GPIO.HIGH)
-        time.sleep(self.TRIGGER_DURATION_US / 1_000_000)
-        GPIO.output(self.config.rx_pin, GPIO.LOW)
+        # Pulse RX HIGH for at least 20μs to trigger ranging; spin rather
+        # than sleep so the pulse is not stretched by scheduler latency
+        self._set_high()
+        busy_wait_ns(self._trigger_ns)
+        self._set_low()
         
     def read_serial_measurement(self) -> Optional[float]:
         """Read one range measurement from serial output"""
@@ -133,65 +493,77 @@ class MB1300Sensor:
             return None
             
         # MB1300 outputs: Rxxx\\r where xxx is range in inches
-        line = self.serial.read_line(timeout_ms=200)
-        
-        if not line:
-            return None
-            
-        # Parse "Rxxx" format
-        if line.startswith('R') and len(line) >= 2:
-            try:
-                range_inches = int(line[1:])
-                return float(range_inches)
-            except ValueError:
-                return None
-                
-        return None
+        ranges, _ = self.serial.read_frames(1, timeout_ms=200)
+        return float(ranges[0]) if ranges else None
     
-    def capture_pulse_series(self, num_pulses: int = 10, cycle: int = 0) -> List[RangeMeasurement]:
-        """Capture multiple measurements from sensor after trigger"""
-        measurements = []
+    def capture_pulse_series(self, num_pulses: int = 10, cycle: int = 0,
+                             verbose: bool = False) -> List[RangeMeasurement]:
+        """Capture multiple measurements from sensor after trigger (verbose: print every pulse)"""
+        # Frames still queued belong to an earlier trigger; drop them so
+        # they are not reported as this series' first pulses
+        self.serial.discard()
         
         # Trigger the sensor
         self.trigger()
         
-        # Small delay for sensor to start responding
-        time.sleep(0.005)
+        # Capture the specified number of readings in one batch; the read
+        # itself waits for the first frame, so no settle delay is needed
+        ranges, timestamps_ns = self.serial.read_frames(num_pulses, timeout_ms=200)
+        
+        # Build the slotted records positionally (no keyword-argument
+        # matching per pulse), keeping each frame's arrival stamp
+        offset_ns = MONOTONIC_TO_EPOCH_NS
+        measurements = [
+            RangeMeasurement(float(range_inches), range_inches, (ts + offset_ns) / 1e9, cycle, pulse_num)
+            for pulse_num, (range_inches, ts) in enumerate(zip(ranges, timestamps_ns), 1)
+        ]
+            
+        # Store the whole series at once
+        self._store_batch(ranges, timestamps_ns, cycle)
         
-        # Capture the specified number of readings
-        for pulse_num in range(1, num_pulses + 1):
-            distance = self.read_serial_measurement()
+        if verbose:
+            name = self.config.name
+            sys.stdout.write(''.join(
+                f"  [{name}] Pulse {m.pulse_number:2d}: {m.distance_inches:6.2f} in\n" for m in measurements))
             
-            if distance is not None:
-                measurement = RangeMeasurement(
-                    distance_inches=distance,
-                    raw_value=int(distance),
-                    timestamp=time.time(),
-                    cycle=cycle,
-                    pulse_number=pulse_num
-                )
-                measurements.append(measurement)
-                self.measurements.append(measurement)
-                
-                print(f"  [{self.config.name}] Pulse {pulse_num:2d}: {distance:6.2f} in")
-            else:
-                print(f"  Warning: {self.config.name} pulse {pulse_num} timeout or invalid")
+        if len(ranges) < num_pulses:
+            print(f"  Warning: {self.config.name} got {len(ranges)}/{num_pulses} readings (timeout or invalid)")
                 
         return measurements
     
     def get_recent_measurements(self, count: int = 10) -> List[RangeMeasurement]:
         """Get the most recent measurements"""
-        return list(self.measurements)[-count:]
+        # Index back from the head instead of materializing the whole ring
+        size = self.MAX_MEASUREMENTS
+        head = self._head
+        n = max(0, min(count, len(self)))
+        return [
+            RangeMeasurement(self._dist[i], self._raw[i], (self._ts[i] + MONOTONIC_TO_EPOCH_NS) / 1e9,
+                             self._cycle[i], self._pulse[i])
+            for i in (j % size for j in range(head - n, head))
+        ]
 
 
 class DualSensorController:
     """Controller for two MB1300AE sensors with alternating triggering."""
     
+    REALTIME_CPU = 3        # Core for the capture loop (isolate it with isolcpus=3)
+    REALTIME_PRIORITY = 80  # SCHED_FIFO priority for the capture loop
+    SENSOR_STAGGER_S = 0.003  # Trigger offset between sensors in overlapped cycles
+    
     def __init__(self, sensor1_config: SensorConfig, sensor2_config: SensorConfig):
         self.sensor1 = MB1300Sensor(sensor1_config)
         self.sensor2 = MB1300Sensor(sensor2_config)
         self.cycle_count = 0
         self.running = False
+        self._pool = None  # Worker threads for overlapped UART captures
+        self.verbose = False  # Print every pulse instead of one line per sensor per cycle
+        # Measurements are appended to this CSV as they are captured, so the
+        # file holds the full run while the ring buffers stay bounded
+        self.csv_path = None
+        self._csv_file = None
+        self._csv_writer = None
+        self._logged = 0
         
     def setup(self):
         """Initialize both sensors"""
@@ -206,29 +578,120 @@ class DualSensorController:
         print(f"Waiting for sensors to warm up ({MB1300Sensor.SENSOR_WARMUP_MS}ms)...")
         time.sleep(MB1300Sensor.SENSOR_WARMUP_MS / 1000.0)
         
+        self.open_log()
         print("Ready to capture data!")
         
+    def open_log(self, filename: str = None):
+        """Open the CSV that captured measurements are streamed to"""
+        if filename is None:
+            # Create data directory if it doesn't exist
+            os.makedirs('data', exist_ok=True)
+            timestamp = int(time.time())
+            filename = f'data/ultrasonic_data_{timestamp}.csv'
+            
+        self.csv_path = filename
+        self._csv_file = open(filename, 'w', newline='', buffering=1 << 16)
+        self._csv_writer = csv.writer(self._csv_file)
+        self._csv_writer.writerow(['Sensor', 'Cycle', 'Pulse_Number', 'Distance_Inches', 'Raw_Value', 'Timestamp'])
+        print(f"Logging measurements to: {os.path.abspath(filename)}")
+        
+    def _log(self, sensor: MB1300Sensor, measurements: List[RangeMeasurement]):
+        """Append one pulse series to the CSV log (buffered, flushed per cycle)"""
+        if self._csv_writer is None or not measurements:
+            return
+        name = sensor.config.name
+        self._csv_writer.writerows(
+            (name, m.cycle, m.pulse_number, f"{m.distance_inches:.2f}", m.raw_value, f"{m.timestamp:.6f}")
+            for m in measurements
+        )
+        self._logged += len(measurements)
+            
+    def _flush_log(self):
+        """Push the cycle's rows to disk"""
+        if self._csv_file is not None:
+            self._csv_file.flush()
+                
+    def close_log(self):
+        """Close the CSV log"""
+        if self._csv_file is None:
+            return
+        self._csv_file.close()
+        self._csv_file = self._csv_writer = None
+        print(f"Saved {self._logged} measurements to: {os.path.abspath(self.csv_path)}")
+        
+    def enable_realtime(self, cpu: int = REALTIME_CPU, priority: int = REALTIME_PRIORITY) -> bool:
+        """
+        Pin the calling thread to one core and run it under SCHED_FIFO
+        
+        Keeps the scheduler from preempting the software serial bit timing.
+        Threads started afterwards (the UART reader threads created in
+        setup() and the overlapped single_cycle pool) inherit the affinity
+        and policy, so call this before setup().
+        Needs root; returns False (default scheduling) if refused.
+        """
+        return enable_realtime(priority, cpu)
+        
     def cleanup(self):
         """Clean up GPIO resources"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self.close_log()
+        for sensor in (self.sensor1, self.sensor2):
+            if isinstance(sensor.serial, UartSerial):
+                sensor.serial.close()
+        close_value_fds()
+        close_fast_gpio()
         GPIO.cleanup()
         print("GPIO cleanup complete")
         
+    def _report(self, sensor: MB1300Sensor, measurements: List[RangeMeasurement]):
+        """Print the one-line summary of a sensor's pulse series"""
+        if measurements:
+            distances = [m.distance_inches for m in measurements]
+            sys.stdout.write(f"  Captured {len(measurements)} from {sensor.config.name} "
+                             f"({min(distances):.2f}-{max(distances):.2f} in)\n")
+        else:
+            sys.stdout.write(f"  Captured 0 from {sensor.config.name}\n")
+            
     def single_cycle(self, pulses_per_trigger: int = 10):
         """Execute one cycle: trigger sensor1, then sensor2"""
         self.cycle_count += 1
         
+        if isinstance(self.sensor1.serial, UartSerial) and isinstance(self.sensor2.serial, UartSerial):
+            # UART frames are read by per-port threads and waiting for them
+            # releases the GIL, so both captures can overlap; software serial
+            # must stay sequential
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=2)
+                
+            print(f"\n[Cycle {self.cycle_count}] Triggering {self.sensor1.config.name} and {self.sensor2.config.name}...")
+            future1 = self._pool.submit(self.sensor1.capture_pulse_series, pulses_per_trigger, self.cycle_count, self.verbose)
+            # Short stagger so the two pings do not overlap
+            time.sleep(self.SENSOR_STAGGER_S)
+            future2 = self._pool.submit(self.sensor2.capture_pulse_series, pulses_per_trigger, self.cycle_count, self.verbose)
+            
+            measurements1, measurements2 = future1.result(), future2.result()
+            self._report(self.sensor1, measurements1)
+            self._report(self.sensor2, measurements2)
+            self._log(self.sensor1, measurements1)
+            self._log(self.sensor2, measurements2)
+            return
+            
         # Trigger and capture from Sensor 1
         print(f"\n[Cycle {self.cycle_count}] Triggering {self.sensor1.config.name}...")
-        measurements1 = self.sensor1.capture_pulse_series(pulses_per_trigger, self.cycle_count)
-        print(f"  Captured {len(measurements1)} from {self.sensor1.config.name}")
+        measurements1 = self.sensor1.capture_pulse_series(pulses_per_trigger, self.cycle_count, self.verbose)
+        self._report(self.sensor1, measurements1)
+        self._log(self.sensor1, measurements1)
         
         # Small delay between sensors
         time.sleep(0.02)
         
         # Trigger and capture from Sensor 2
         print(f"[Cycle {self.cycle_count}] Triggering {self.sensor2.config.name}...")
-        measurements2 = self.sensor2.capture_pulse_series(pulses_per_trigger, self.cycle_count)
-        print(f"  Captured {len(measurements2)} from {self.sensor2.config.name}")
+        measurements2 = self.sensor2.capture_pulse_series(pulses_per_trigger, self.cycle_count, self.verbose)
+        self._report(self.sensor2, measurements2)
+        self._log(self.sensor2, measurements2)
         
     def continuous_capture(self, pulses_per_trigger: int = 10, delay_between_cycles: float = 0.1):
         """Continuously capture data until stopped"""
@@ -241,6 +704,7 @@ class DualSensorController:
         try:
             while self.running:
                 self.single_cycle(pulses_per_trigger)
+                self._flush_log()
                 
                 # Show progress every 5 cycles
                 if self.cycle_count % 5 == 0:
@@ -260,45 +724,37 @@ class DualSensorController:
         print("Capture loop stopped")
         
     def get_all_measurements(self) -> List[tuple]:
-        """Get all measurements from both sensors"""
-        all_measurements = []
-        
-        for m in self.sensor1.measurements:
-            all_measurements.append(('Sensor_1', m))
-            
-        for m in self.sensor2.measurements:
-            all_measurements.append(('Sensor_2', m))
-        
-        # Sort by timestamp
-        all_measurements.sort(key=lambda x: x[1].timestamp)
-        
-        return all_measurements
+        """Get all measurements from both sensors, in timestamp order"""
+        # Each sensor's measurements are already oldest-first, so a linear
+        # merge replaces concatenating and sorting
+        return list(heapq.merge(
+            zip(repeat('Sensor_1'), self.sensor1.measurements),
+            zip(repeat('Sensor_2'), self.sensor2.measurements),
+            key=lambda item: item[1].timestamp))
         
     def save_to_csv(self, filename: str = None):
-        """Save all measurements to CSV file"""
+        """Save a snapshot of the buffered measurements to a CSV file"""
         if filename is None:
             # Create data directory if it doesn't exist
             os.makedirs('data', exist_ok=True)
             timestamp = int(time.time())
             filename = f'data/ultrasonic_data_{timestamp}.csv'
             
-        measurements = self.get_all_measurements()
+        # Each sensor's columns are already in time order, so a merge
+        # replaces building and sorting RangeMeasurement objects
+        merged = heapq.merge(self.sensor1.rows('Sensor_1'), self.sensor2.rows('Sensor_2'))
+        offset_ns = MONOTONIC_TO_EPOCH_NS
         
-        with open(filename, 'w', newline='') as csvfile:
+        with open(filename, 'w', newline='', buffering=1 << 20) as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(['Sensor', 'Cycle', 'Pulse_Number', 'Distance_Inches', 'Raw_Value', 'Timestamp'])
+            writer.writerows(
+                (name, cycle, pulse, f"{distance:.2f}", raw, f"{(ts + offset_ns) * 1e-9:.6f}")
+                for ts, name, cycle, pulse, distance, raw in merged
+            )
             
-            for sensor_name, m in measurements:
-                writer.writerow([
-                    sensor_name,
-                    m.cycle,
-                    m.pulse_number,
-                    f"{m.distance_inches:.2f}",
-                    m.raw_value,
-                    f"{m.timestamp:.6f}"
-                ])
-                
-        print(f"Saved {len(measurements)} measurements to: {os.path.abspath(filename)}")
+        count = len(self.sensor1) + len(self.sensor2)
+        print(f"Saved {count} measurements to: {os.path.abspath(filename)}")
         
     def print_statistics(self):
         """Print statistics for both sensors"""
@@ -307,17 +763,18 @@ class DualSensorController:
         print("=" * 60)
         
         for sensor in [self.sensor1, self.sensor2]:
-            if len(sensor.measurements) == 0:
+            stats = sensor.statistics()
+            if stats is None:
                 print(f"\n{sensor.config.name}: No measurements captured")
                 continue
                 
-            distances = [m.distance_inches for m in sensor.measurements]
+            n, lo, hi, avg = stats
             
             print(f"\n{sensor.config.name}:")
-            print(f"  Total measurements: {len(distances)}")
-            print(f"  Min distance: {min(distances):.2f} inches")
-            print(f"  Max distance: {max(distances):.2f} inches")
-            print(f"  Average distance: {sum(distances)/len(distances):.2f} inches")
+            print(f"  Total measurements: {n}")
+            print(f"  Min distance: {lo:.2f} inches")
+            print(f"  Max distance: {hi:.2f} inches")
+            print(f"  Average distance: {avg:.2f} inches")
 
 
 def main():
@@ -327,19 +784,33 @@ def main():
     sensor1_config = SensorConfig(
         name="Sensor_1",
         tx_pin=12,  # Pin 12 - GPIO4_A4 - Read serial data (from sensor Pin 5)
-        rx_pin=16   # Pin 16 - GPIO4_B0 - Trigger control (to sensor Pin 4)
+        rx_pin=TRIGGER_PINS.get(12, 16),  # Pin 16 - GPIO4_B0 - Trigger control (to sensor Pin 4)
+        uart_port=UART_PORTS.get(12)
     )
     
     sensor2_config = SensorConfig(
         name="Sensor_2", 
         tx_pin=18,  # Pin 18 - GPIO4_B1 - Read serial data (from sensor Pin 5)
-        rx_pin=22   # Pin 22 - GPIO4_B2 - Trigger control (to sensor Pin 4)
+        rx_pin=TRIGGER_PINS.get(18, 22),  # Pin 22 - GPIO4_B2 - Trigger control (to sensor Pin 4)
+        uart_port=UART_PORTS.get(18)
     )
     
+    # Driving the trigger on the UART's RX pin would take the pin away from
+    # the UART and send the trigger pulses into the sensor's TX line
+    for config in (sensor1_config, sensor2_config):
+        if UART_RX_PINS.get(config.uart_port) == config.rx_pin:
+            print(f"Error: {config.name} trigger pin {config.rx_pin} is the RX pin of {config.uart_port}; "
+                  f"move the trigger with MB1300_TRIGGER_PINS (e.g. \"{config.tx_pin}=11\")")
+            sys.exit(1)
+    
     # Create controller
     controller = DualSensorController(sensor1_config, sensor2_config)
     
     try:
+        # Reduce timing jitter in the capture loop; before setup() so the
+        # UART reader threads it starts inherit the policy and affinity
+        controller.enable_realtime()
+        
         # Setup GPIO
         controller.setup()
         
@@ -356,14 +827,10 @@ def main():
         # Stop capture
         controller.stop_capture()
         
-        # Save data to CSV
-        print("\nSaving data to CSV...")
-        controller.save_to_csv()
-        
         # Print statistics
         controller.print_statistics()
         
-        # Cleanup
+        # Cleanup (closes the CSV log)
         controller.cleanup()
         print("\nGoodbye!")
 
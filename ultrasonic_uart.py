@@ -9,19 +9,36 @@ WIRING REQUIREMENTS:
 - If Pin 1 is floating or LOW, sensor outputs binary data instead of ASCII
 """
 
+import select
+import signal
 import serial
+import sys
 import time
-import csv
 import os
+from array import array
 from dataclasses import dataclass
 from datetime import datetime
+from itertools import chain
 from typing import List, Optional
 
-@dataclass
+# Offset from time.monotonic_ns() to epoch ns, fixed at startup so reading
+# timestamps never step with the wall clock but still export as epoch time
+MONOTONIC_TO_EPOCH_NS = time.time_ns() - time.monotonic_ns()
+_monotonic_ns = time.monotonic_ns
+
+FRAME_END = b'\r'  # Terminator of each "Rxxx\r" frame
+FRAME_DIGITS = 3   # Distance digits in a frame (at most 999 cm)
+
+# CSV rows are formatted straight to bytes: every field is a number, so
+# nothing ever needs quoting (same layout and \r\n endings as csv.writer)
+CSV_HEADER = b'Sensor_ID,Timestamp,Distance_cm,Reading_Number\r\n'
+CSV_ROW = b'%d,%d.%06d,%d,%d\r\n'
+
+@dataclass(slots=True, frozen=True)
 class SensorReading:
     """Data structure for a sensor reading"""
     sensor_id: int
-    timestamp: float
+    timestamp_ns: int  # time.monotonic_ns(); see MONOTONIC_TO_EPOCH_NS
     distance_cm: int
     reading_number: int
 
@@ -39,6 +56,20 @@ class MB1300Sensor:
         self.sensor_id = sensor_id
         self.uart_port = uart_port
         self.serial_port = None
+        self._read = None  # Bound serial_port.read, set in open()
+        self._pending = bytearray()  # Received bytes not yet forming a full frame
+        self.reading_number = 0  # Number of the last reading in the current series
+        self.parse_errors = 0  # Malformed frames in the current series
+        self.last_parse_error = b''  # Most recent malformed frame, for the report
+        
+    def start_series(self):
+        """Restart reading numbers at 1 for a new series of readings"""
+        self.reading_number = 0
+        self.parse_errors = 0
+        
+    def fileno(self) -> int:
+        """File descriptor of the open port, so the sensor can be passed to select()"""
+        return self.serial_port.fileno()
         
     def open(self):
         """Open the serial port"""
@@ -52,6 +83,9 @@ class MB1300Sensor:
                 timeout=1.0
             )
             print(f"Sensor {self.sensor_id}: Opened {self.uart_port}")
+            # Bind the read method once for the per-frame calls
+            self._read = self.serial_port.read
+            self._set_low_latency()
             # Clear any buffered data
             self.serial_port.reset_input_buffer()
             return True
@@ -59,19 +93,29 @@ class MB1300Sensor:
             print(f"Sensor {self.sensor_id}: Failed to open {self.uart_port}: {e}")
             return False
     
+    def _set_low_latency(self):
+        """Have the driver deliver received bytes immediately (best effort)"""
+        # ASYNC_LOW_LATENCY: push each byte to the tty layer right away
+        # instead of on the next flip-buffer work run; Linux only, and not
+        # every driver allows it
+        try:
+            self.serial_port.set_low_latency_mode(True)
+        except (AttributeError, OSError, ValueError):
+            pass
+    
     def close(self):
         """Close the serial port"""
         if self.serial_port and self.serial_port.is_open:
             self.serial_port.close()
             print(f"Sensor {self.sensor_id}: Closed {self.uart_port}")
     
-    def read_distance(self, reading_number: int) -> Optional[SensorReading]:
+    def read_distance(self) -> Optional[SensorReading]:
         """
         Read one distance measurement from serial output
         
-        Args:
-            reading_number: Sequential reading number
-            
+        The reading is numbered from the sensor's own counter (see
+        start_series()).
+        
         Returns:
             SensorReading object or None if read failed
         """
@@ -79,35 +123,93 @@ class MB1300Sensor:
             return None
         
         try:
-            # Read until we get a complete line (ending with \r)
-            line = self.serial_port.read_until(b'\r')
-            
-            if not line:
-                return None
-            
-            # Parse the line: format is "Rxxx\r" where xxx is distance in cm
-            line_str = line.decode('ascii', errors='ignore').strip()
-            
-            if line_str.startswith('R') and len(line_str) > 1:
-                distance_str = line_str[1:]
-                distance_cm = int(distance_str)
-                
-                return SensorReading(
-                    sensor_id=self.sensor_id,
-                    timestamp=time.time(),
-                    distance_cm=distance_cm,
-                    reading_number=reading_number
-                )
-        except (ValueError, UnicodeDecodeError) as e:
-            print(f"Sensor {self.sensor_id}: Parse error: {e}")
+            # Bulk-read whatever has arrived into the frame buffer (one
+            # syscall per batch, not read_until's one per byte) until it
+            # holds a complete line (ending with \r)
+            deadline = time.monotonic() + self.serial_port.timeout
+            while FRAME_END not in self._pending:
+                data = self._read(self.serial_port.in_waiting or 1)
+                if not data or time.monotonic() > deadline:
+                    return None
+                self._pending += data
+        except Exception as e:
+            print(f"Sensor {self.sensor_id}: Read error: {e}")
+            return None
+        
+        return self._next_frame()
+    
+    def read_distance_nowait(self) -> Optional[SensorReading]:
+        """
+        Return the next complete reading from data already received
+        
+        Never blocks: pulls whatever bytes the driver has buffered and
+        returns None until a full "Rxxx\\r" frame is available.
+        
+        Returns:
+            SensorReading object or None if no complete frame is pending
+        """
+        if not self.serial_port or not self.serial_port.is_open:
+            return None
+        
+        try:
+            waiting = self.serial_port.in_waiting
+            if waiting:
+                self._pending += self._read(waiting)
         except Exception as e:
             print(f"Sensor {self.sensor_id}: Read error: {e}")
+            return None
         
-        return None
+        return self._next_frame()
+    
+    def _next_frame(self) -> Optional[SensorReading]:
+        """Take the first valid frame out of the buffer, parse and number it"""
+        # Garbled frames are dropped so they do not hide the ones behind them
+        while True:
+            end = self._pending.find(FRAME_END) + 1
+            if not end:
+                return None
+            line = bytes(self._pending[:end])
+            del self._pending[:end]
+            reading = self._parse_line(line, self.reading_number + 1)
+            if reading:
+                self.reading_number = reading.reading_number
+                return reading
+    
+    def _parse_line(self, line: bytes, reading_number: int) -> Optional[SensorReading]:
+        """Parse one "Rxxx\\r" frame, where xxx is distance in cm"""
+        # Work on the bytes directly: no decode, str slicing or int(str)
+        if len(line) == 5 and line[0] == 0x52 and line[4] == 0x0D and line[1:4].isdigit():
+            # The MB1300 normally sends exactly "R" + 3 digits + "\r"
+            distance_cm = line[1] * 100 + line[2] * 10 + line[3] - 0x30 * 111
+        else:
+            # Anything else (stray whitespace, other widths) goes the slow way
+            line = line.strip()
+            if len(line) < 2 or line[0] != 0x52:  # b'R'
+                return None
+            
+            # isdigit() first: int() alone would also take b'+1_0' or spaces.
+            # More than FRAME_DIGITS digits is corrupt input and would not
+            # fit the uint16 distance column
+            digits = line[1:]
+            if len(digits) > FRAME_DIGITS or not digits.isdigit():
+                # Counted rather than printed; reported once per series
+                self.parse_errors += 1
+                self.last_parse_error = line
+                return None
+            distance_cm = int(digits)
+        
+        return SensorReading(
+            sensor_id=self.sensor_id,
+            timestamp_ns=_monotonic_ns(),
+            distance_cm=distance_cm,
+            reading_number=reading_number
+        )
 
 class DualSensorController:
     """Controller for managing two MB1300AE sensors"""
     
+    READ_TIMEOUT_S = 1.0  # A sensor with no frame for this long counts a failed reading
+    
     def __init__(self, uart1: str = "/dev/ttyS4", uart2: str = "/dev/ttyS3"):
         """
         Initialize controller with two sensors
@@ -119,12 +221,27 @@ class DualSensorController:
         self.sensor1 = MB1300Sensor(1, uart1)
         self.sensor2 = MB1300Sensor(2, uart2)
         self.data_dir = "data"
+        self.running = False
+        self.csv_path = None
+        self._csv_fd = None
+        self._csv_header = b''  # Header not yet written (goes out with the first rows)
+        
+        # Readings captured this cycle, one packed column per field
+        # (struct of arrays) instead of a list of SensorReading objects
+        self._allocate_cycle_buffer(10)
+        
+    def _allocate_cycle_buffer(self, readings_per_sensor: int):
+        """Preallocate the cycle columns for one cycle of both sensors"""
+        # Fixed capacity, reused every cycle: no growth or reallocation
+        capacity = 2 * readings_per_sensor
+        self._sensor_ids = array('B', bytes(capacity))
+        self._timestamps = array('q', [0]) * capacity
+        self._distances = array('H', [0]) * capacity
+        self._reading_numbers = array('I', [0]) * capacity
+        self._filled = 0  # Rows of the current cycle
         
     def setup(self) -> bool:
         """Initialize sensors"""
-        # Create data directory
-        os.makedirs(self.data_dir, exist_ok=True)
-        
         # Open serial ports
         success1 = self.sensor1.open()
         success2 = self.sensor2.open()
@@ -134,14 +251,24 @@ class DualSensorController:
             self.cleanup()
             return False
         
-        print("\n" + "="*60)
-        print("Hardware UART Configuration:")
-        print(f"  Sensor 1: {self.sensor1.uart_port} (Pin 16 - UART4_RX_M0)")
-        print(f"  Sensor 2: {self.sensor2.uart_port} (Pin 21 - UART3_RX_M0)")
-        print("\nIMPORTANT: Sensor Pin 1 (BW) must be connected to 3.3V!")
-        print("  - Pin 1 HIGH = ASCII serial output (Rxxx\\r format)")
-        print("  - Pin 1 LOW/floating = Binary analog data (not usable)")
-        print("="*60 + "\n")
+        # One CSV per run, named and created once here; each cycle appends
+        # only its new readings
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.csv_path = os.path.join(self.data_dir, f"sensor_data_{datetime.now():%Y%m%d_%H%M%S}.csv")
+        # Kept open for the whole session; O_APPEND so a restart within the
+        # same second adds to the file instead of truncating it
+        self._csv_fd = os.open(self.csv_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        if os.fstat(self._csv_fd).st_size == 0:
+            self._csv_header = CSV_HEADER
+        
+        print(f"\n{'='*60}\n"
+              f"Hardware UART Configuration:\n"
+              f"  Sensor 1: {self.sensor1.uart_port} (Pin 16 - UART4_RX_M0)\n"
+              f"  Sensor 2: {self.sensor2.uart_port} (Pin 21 - UART3_RX_M0)\n"
+              f"\nIMPORTANT: Sensor Pin 1 (BW) must be connected to 3.3V!\n"
+              f"  - Pin 1 HIGH = ASCII serial output (Rxxx\\r format)\n"
+              f"  - Pin 1 LOW/floating = Binary analog data (not usable)\n"
+              f"{'='*60}\n")
         
         return True
     
@@ -149,6 +276,12 @@ class DualSensorController:
         """Clean up resources"""
         self.sensor1.close()
         self.sensor2.close()
+        if self._csv_fd is not None:
+            if self._csv_header:
+                os.write(self._csv_fd, self._csv_header)
+            os.close(self._csv_fd)
+            self._csv_fd = None
+            print(f"Data saved to: {self.csv_path}")
     
     def capture_alternating(self, readings_per_sensor: int = 10):
         """
@@ -157,71 +290,125 @@ class DualSensorController:
         Args:
             readings_per_sensor: Number of readings to capture per cycle
         """
-        try:
-            cycle = 0
-            all_readings: List[SensorReading] = []
+        cycle = 0
+        total_readings = 0
+        if len(self._sensor_ids) != 2 * readings_per_sensor:
+            self._allocate_cycle_buffer(readings_per_sensor)
+        
+        print("Starting continuous data capture...")
+        print("Press Ctrl+C to stop\n")
+        
+        # Checked once per cycle: stop() (the SIGINT handler in main) lets
+        # the current cycle finish and be saved instead of unwinding mid-write
+        self.running = True
+        while self.running:
+            cycle += 1
+            # Collect the cycle's output and write it once at the end,
+            # rather than one stdout write per reading between reads
+            log = [f"\n{'='*60}", f"Cycle {cycle}", f"{'='*60}\n"]
+            
+            # Capture from both sensors at once
+            log.append(f"Capturing {readings_per_sensor} readings from each sensor...")
+            self._capture_concurrent(readings_per_sensor, log)
             
-            print("Starting continuous data capture...")
-            print("Press Ctrl+C to stop\n")
+            # Append this cycle's readings to the CSV
+            total_readings += self._save_readings()
+            log.append(f"\nCycle {cycle} complete. Total readings collected: {total_readings}\n")
+            sys.stdout.write("\n".join(log))
+            sys.stdout.flush()
             
-            while True:
-                cycle += 1
-                print(f"\n{'='*60}")
-                print(f"Cycle {cycle}")
-                print(f"{'='*60}\n")
-                
-                # Capture from Sensor 1
-                print(f"Capturing {readings_per_sensor} readings from Sensor 1...")
-                for i in range(readings_per_sensor):
-                    reading = self.sensor1.read_distance(i + 1)
-                    if reading:
-                        all_readings.append(reading)
-                        print(f"  Sensor 1 Reading {i+1}: {reading.distance_cm} cm")
-                    else:
-                        print(f"  Sensor 1 Reading {i+1}: FAILED")
-                    time.sleep(0.1)  # MB1300 ranges ~10Hz
-                
-                # Capture from Sensor 2
-                print(f"\nCapturing {readings_per_sensor} readings from Sensor 2...")
-                for i in range(readings_per_sensor):
-                    reading = self.sensor2.read_distance(i + 1)
-                    if reading:
-                        all_readings.append(reading)
-                        print(f"  Sensor 2 Reading {i+1}: {reading.distance_cm} cm")
-                    else:
-                        print(f"  Sensor 2 Reading {i+1}: FAILED")
-                    time.sleep(0.1)
-                
-                # Save data after each cycle
-                self._save_readings(all_readings)
-                print(f"\nCycle {cycle} complete. Total readings collected: {len(all_readings)}")
-                
-        except KeyboardInterrupt:
-            print("\n\nStopping capture...")
-            self._save_readings(all_readings)
-            print(f"Total readings collected: {len(all_readings)}")
+        print("\nCapture stopped")
+        print(f"Total readings collected: {total_readings}")
     
-    def _save_readings(self, readings: List[SensorReading]):
-        """Save readings to CSV file"""
-        if not readings:
-            return
+    def stop(self):
+        """Ask capture_alternating to stop after the current cycle"""
+        self.running = False
+    
+    def _capture_concurrent(self, readings_per_sensor: int, log: List[str]):
+        """
+        Read from both sensors as frames arrive on either UART
+        
+        The sensors range independently at ~10Hz, so instead of reading one
+        and then the other with fixed sleeps, wait in select() on both ports
+        and take each frame as soon as its port has data.
+        
+        Args:
+            readings_per_sensor: Number of readings to capture per sensor
+            log: List the per-reading output lines are appended to
+        """
+        sensors = (self.sensor1, self.sensor2)
+        now = time.monotonic()
+        deadlines = {}
+        for sensor in sensors:
+            sensor.start_series()
+            deadlines[sensor] = now + self.READ_TIMEOUT_S
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(self.data_dir, f"sensor_data_{timestamp}.csv")
+        while True:
+            active = [sensor for sensor in sensors if sensor.reading_number < readings_per_sensor]
+            if not active:
+                break
+            
+            timeout = max(0.0, min(deadlines[sensor] for sensor in active) - time.monotonic())
+            ready, _, _ = select.select(active, [], [], timeout)
+            now = time.monotonic()
+            
+            for sensor in active:
+                if sensor in ready:
+                    # Take every complete frame that has arrived
+                    while sensor.reading_number < readings_per_sensor:
+                        reading = sensor.read_distance_nowait()
+                        if not reading:
+                            break
+                        deadlines[sensor] = now + self.READ_TIMEOUT_S
+                        row = self._filled
+                        self._sensor_ids[row] = reading.sensor_id
+                        self._timestamps[row] = reading.timestamp_ns
+                        self._distances[row] = reading.distance_cm
+                        self._reading_numbers[row] = reading.reading_number
+                        self._filled = row + 1
+                        log.append(f"  Sensor {sensor.sensor_id} Reading {reading.reading_number}: {reading.distance_cm} cm")
+                if now >= deadlines[sensor]:
+                    # The missed reading still uses up its number
+                    sensor.reading_number += 1
+                    deadlines[sensor] = now + self.READ_TIMEOUT_S
+                    log.append(f"  Sensor {sensor.sensor_id} Reading {sensor.reading_number}: FAILED")
         
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Sensor_ID', 'Timestamp', 'Distance_cm', 'Reading_Number'])
+        for sensor in sensors:
+            if sensor.parse_errors:
+                log.append(f"  Sensor {sensor.sensor_id}: {sensor.parse_errors} parse error(s), "
+                           f"last: {sensor.last_parse_error!r}")
+    
+    def _save_readings(self) -> int:
+        """Append the cycle's readings to the run's CSV file and clear them; returns the count"""
+        count = self._filled
+        if count and self._csv_fd is not None:
+            # Format the whole cycle with one %-operation over a repeated row
+            # template, so the row formatting loop runs in C rather than one
+            # Python-level format call per row. Monotonic timestamps become
+            # epoch seconds only here, split with integer arithmetic
+            # (microsecond resolution, no float %f)
+            offset_us = MONOTONIC_TO_EPOCH_NS // 1000
+            epoch_us = [ns // 1000 + offset_us for ns in memoryview(self._timestamps)[:count]]
+            fields = chain.from_iterable(zip(
+                memoryview(self._sensor_ids)[:count],
+                [us // 1_000_000 for us in epoch_us],
+                [us % 1_000_000 for us in epoch_us],
+                memoryview(self._distances)[:count],
+                memoryview(self._reading_numbers)[:count]))
+            rows = (CSV_ROW * count) % tuple(fields)
             
-            for reading in readings:
-                writer.writerow([
-                    reading.sensor_id,
-                    f"{reading.timestamp:.6f}",
-                    reading.distance_cm,
-                    reading.reading_number
-                ])
-        
-        print(f"Data saved to: {filename}")
+            # Rows are already one blob per cycle, so write straight to the
+            # fd (no fsync) instead of through a buffer that is flushed every
+            # cycle anyway; the first write carries the header along in the
+            # same syscall
+            if self._csv_header:
+                os.writev(self._csv_fd, [self._csv_header, rows])
+                self._csv_header = b''
+            else:
+                os.write(self._csv_fd, rows)
+        
+        self._filled = 0
+        return count
 
 def main():
     """Main execution function"""
@@ -237,6 +424,16 @@ def main():
             print("Setup failed!")
             return 1
         
+        # First Ctrl+C ends the capture at the next cycle boundary; a second
+        # one raises KeyboardInterrupt as usual, e.g. when a cycle is stuck
+        # waiting on sensors that stopped responding
+        def on_sigint(signum, frame):
+            controller.stop()
+            print("\nStopping after this cycle (Ctrl+C again to abort)...")
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            
+        signal.signal(signal.SIGINT, on_sigint)
+        
         # Run continuous capture with 10 readings per sensor per cycle
         controller.capture_alternating(readings_per_sensor=10)
         